@@ -3,11 +3,31 @@
 Analyze CYHZ OSM data - Using 'around' approach instead of area
 """
 
-import requests
+import gzip
+import hashlib
 import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+import requests
+
+try:
+    import orjson
+except ImportError:
+    # Optional: stdlib json is used when the faster C decoder isn't installed
+    orjson = None
 
 overpass_url = "https://overpass-api.de/api/interpreter"
 
+# Re-runs load the cached response instead of re-querying Overpass;
+# pass --refresh to force a new download
+CACHE_DIR = Path.home() / '.cache' / 'mapbuilder'
+
+# Keep-alive session with gzip on the wire (Overpass JSON compresses ~8x)
+SESSION = requests.Session()
+SESSION.headers['Accept-Encoding'] = 'gzip, deflate'
+
 # Simpler query using 'around' instead of area
 query = """
 [out:json][timeout:90];
@@ -19,6 +39,7 @@ query = """
 )->.airport;
 
 // Get features within 2km of the airport
+// (only the tag families the analysis below actually reads)
 (
   way["aeroway"](around.airport:2000);
   node["aeroway"](around.airport:2000);
@@ -28,30 +49,70 @@ query = """
   way["landuse"](around.airport:2000);
   way["water"](around.airport:2000);
   way["waterway"](around.airport:2000);
-  way["highway"](around.airport:2000);
-  way["barrier"](around.airport:2000);
 );
 
-out body;
->;
-out skel qt;
+// out geom keeps the node-id lists (used for the closed-way checks) without
+// shipping every untagged skeleton node as a separate element
+out geom;
 """
 
-print("Querying OpenStreetMap for CYHZ (using 'around' method)...")
-print("This may take 30-60 seconds...")
-response = requests.post(overpass_url, data={'data': query}, timeout=120)
-response.raise_for_status()
-data = response.json()
+cache_file = CACHE_DIR / f"{hashlib.sha1(query.encode()).hexdigest()}.json.gz"
+
+if '--refresh' not in sys.argv and cache_file.exists():
+    print("Loading cached Overpass response for CYHZ...")
+    with gzip.open(cache_file, 'rb') as f:
+        raw = f.read()
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+else:
+    print("Querying OpenStreetMap for CYHZ (using 'around' method)...")
+    print("This may take 30-60 seconds...")
+    response = SESSION.post(overpass_url, data={'data': query}, timeout=120)
+    response.raise_for_status()
+    data = orjson.loads(response.content) if orjson is not None else response.json()
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_suffix('.tmp')
+    with gzip.open(tmp_file, 'wb') as f:
+        f.write(response.content)
+    tmp_file.replace(cache_file)
 
 print(f"\n{'='*70}")
 print(f"CYHZ OpenStreetMap Analysis")
 print(f"{'='*70}")
 print(f"\nTotal elements: {len(data['elements'])}")
 
-# Separate by type
-nodes = [e for e in data['elements'] if e['type'] == 'node' and 'tags' in e]
-ways = [e for e in data['elements'] if e['type'] == 'way' and 'tags' in e]
-relations = [e for e in data['elements'] if e['type'] == 'relation' and 'tags' in e]
+# Separate by type and tag family in one pass instead of re-walking the
+# element list for every category below
+nodes = []
+ways = []
+relations = []
+aeroway_nodes = []
+aeroway_ways = []
+building_ways = []
+natural_ways = []
+landuse_ways = []
+
+for e in data['elements']:
+    tags = e.get('tags')
+    if not tags:
+        continue
+    etype = e['type']
+    if etype == 'node':
+        nodes.append(e)
+        if 'aeroway' in tags:
+            aeroway_nodes.append(e)
+    elif etype == 'way':
+        ways.append(e)
+        if 'aeroway' in tags:
+            aeroway_ways.append(e)
+        if 'building' in tags:
+            building_ways.append(e)
+        if 'natural' in tags:
+            natural_ways.append(e)
+        if 'landuse' in tags:
+            landuse_ways.append(e)
+    elif etype == 'relation':
+        relations.append(e)
 
 print(f"Tagged Nodes: {len(nodes)}")
 print(f"Tagged Ways: {len(ways)}")
@@ -62,9 +123,6 @@ print(f"\n{'='*70}")
 print("AEROWAY FEATURES (Critical for Ground Layout)")
 print(f"{'='*70}")
 
-aeroway_ways = [w for w in ways if 'aeroway' in w.get('tags', {})]
-aeroway_nodes = [n for n in nodes if 'aeroway' in n.get('tags', {})]
-
 print(f"\nAeroway Ways: {len(aeroway_ways)}")
 for way in aeroway_ways[:50]:  # Limit to first 50 for readability
     aeroway_type = way['tags']['aeroway']
@@ -94,7 +152,6 @@ print(f"\n{'='*70}")
 print("BUILDINGS")
 print(f"{'='*70}")
 
-building_ways = [w for w in ways if 'building' in w.get('tags', {})]
 print(f"\nTotal buildings: {len(building_ways)}")
 
 building_types = {}
@@ -120,7 +177,6 @@ print(f"\n{'='*70}")
 print("NATURAL FEATURES (Vegetation)")
 print(f"{'='*70}")
 
-natural_ways = [w for w in ways if 'natural' in w.get('tags', {})]
 print(f"\nTotal natural features: {len(natural_ways)}")
 
 natural_types = {}
@@ -136,7 +192,6 @@ print(f"\n{'='*70}")
 print("LANDUSE")
 print(f"{'='*70}")
 
-landuse_ways = [w for w in ways if 'landuse' in w.get('tags', {})]
 print(f"\nTotal landuse features: {len(landuse_ways)}")
 
 landuse_types = {}
@@ -152,29 +207,30 @@ print(f"\n{'='*70}")
 print("MAPPING DECISION SUMMARY")
 print(f"{'='*70}")
 
+# One pass: bucket aeroway ways by (type, is_closed) instead of re-scanning
+# the full list for every type/geometry combination below
+bucket = defaultdict(list)
+for w in aeroway_ways:
+    n = w['nodes']
+    bucket[(w['tags']['aeroway'], n[0] == n[-1])].append(w)
+
 # Taxiways
-taxiways_line = [w for w in aeroway_ways if w['tags']['aeroway'] == 'taxiway' and w['nodes'][0] != w['nodes'][-1]]
-taxiways_area = [w for w in aeroway_ways if w['tags']['aeroway'] == 'taxiway' and w['nodes'][0] == w['nodes'][-1]]
 print(f"\nTaxiways:")
-print(f"  - As LINES (centerlines): {len(taxiways_line)}")
-print(f"  - As AREAS (surfaces): {len(taxiways_area)}")
+print(f"  - As LINES (centerlines): {len(bucket[('taxiway', False)])}")
+print(f"  - As AREAS (surfaces): {len(bucket[('taxiway', True)])}")
 
 # Taxilanes
-taxilanes_line = [w for w in aeroway_ways if w['tags']['aeroway'] == 'taxilane' and w['nodes'][0] != w['nodes'][-1]]
-taxilanes_area = [w for w in aeroway_ways if w['tags']['aeroway'] == 'taxilane' and w['nodes'][0] == w['nodes'][-1]]
 print(f"\nTaxilanes:")
-print(f"  - As LINES: {len(taxilanes_line)}")
-print(f"  - As AREAS: {len(taxilanes_area)}")
+print(f"  - As LINES: {len(bucket[('taxilane', False)])}")
+print(f"  - As AREAS: {len(bucket[('taxilane', True)])}")
 
 # Runways
-runways_line = [w for w in aeroway_ways if w['tags']['aeroway'] == 'runway' and w['nodes'][0] != w['nodes'][-1]]
-runways_area = [w for w in aeroway_ways if w['tags']['aeroway'] == 'runway' and w['nodes'][0] == w['nodes'][-1]]
 print(f"\nRunways:")
-print(f"  - As LINES (centerlines): {len(runways_line)}")
-print(f"  - As AREAS (surfaces): {len(runways_area)}")
+print(f"  - As LINES (centerlines): {len(bucket[('runway', False)])}")
+print(f"  - As AREAS (surfaces): {len(bucket[('runway', True)])}")
 
 # Aprons
-aprons = [w for w in aeroway_ways if w['tags']['aeroway'] == 'apron']
+aprons = bucket[('apron', False)] + bucket[('apron', True)]
 print(f"\nAprons (should be areas): {len(aprons)}")
 
 # Parking positions
@@ -189,8 +245,12 @@ if parking:
 
 # Save full data
 output_file = 'cyhz_osm_full.json'
-with open(output_file, 'w') as f:
-    json.dump(data, f, indent=2)
+if orjson is not None:
+    with open(output_file, 'wb') as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+else:
+    with open(output_file, 'w') as f:
+        json.dump(data, f, indent=2)
 
 print(f"\n{'='*70}")
 print(f"Full OSM data saved to: {output_file}")
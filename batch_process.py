@@ -5,8 +5,11 @@ Batch process multiple airports from OSM to GNG format
 Usage: python batch_process.py
 """
 
-import subprocess
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import osm_to_gng_direct
 
 # Define airports to process
 AIRPORTS = [
@@ -17,63 +20,65 @@ AIRPORTS = [
     {'icao': 'CYFC', 'name': 'Fredericton', 'fir': 'CZQM'},
 ]
 
+# Overpass serializes requests per client; more workers only triggers HTTP 429
+MAX_WORKERS = 2
+
+# Serialize printing so per-airport output doesn't interleave
+_print_lock = threading.Lock()
+
 def process_airport(airport):
-    """Process a single airport"""
+    """Process a single airport in-process via osm_to_gng_direct.run"""
     icao = airport['icao']
     name = airport['name']
     fir = airport['fir']
-    
-    print(f"\n{'='*60}")
-    print(f"Processing {icao} - {name} ({fir})")
-    print(f"{'='*60}")
-    
-    cmd = [
-        'python',
-        'osm_to_gng_direct.py',
-        icao,
-        '--name', name,
-        '--fir', fir,
-        '--output', f'output/{icao}_gng.kml'
-    ]
-    
+
+    with _print_lock:
+        print(f"\n{'='*60}")
+        print(f"Processing {icao} - {name} ({fir})")
+        print(f"{'='*60}")
+
     try:
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-        print(result.stdout)
+        osm_to_gng_direct.run(icao, name, fir=fir, output=f'output/{icao}_gng.kml')
         return True
-    except subprocess.CalledProcessError as e:
-        print(f"ERROR processing {icao}:", file=sys.stderr)
-        print(e.stderr, file=sys.stderr)
+    except Exception as e:
+        with _print_lock:
+            print(f"ERROR processing {icao}: {e}", file=sys.stderr)
         return False
 
 def main():
     """Process all airports"""
     print("CZQM/CZQX Airport Ground Network Batch Processor")
     print(f"Processing {len(AIRPORTS)} airports...\n")
-    
+
     # Create output directory if needed
     import os
     os.makedirs('output', exist_ok=True)
-    
+
     success_count = 0
     failed = []
-    
-    for airport in AIRPORTS:
-        if process_airport(airport):
-            success_count += 1
-        else:
-            failed.append(airport['icao'])
-    
+
+    # Airports are processed concurrently; each one is network-bound waiting
+    # on its Overpass query, so total wall time approaches the slowest airport
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {executor.submit(process_airport, airport): airport
+                   for airport in AIRPORTS}
+        for future in as_completed(futures):
+            if future.result():
+                success_count += 1
+            else:
+                failed.append(futures[future]['icao'])
+
     # Summary
     print(f"\n{'='*60}")
     print(f"SUMMARY")
     print(f"{'='*60}")
     print(f"Successful: {success_count}/{len(AIRPORTS)}")
-    
+
     if failed:
         print(f"Failed: {', '.join(failed)}")
     else:
         print("All airports processed successfully!")
-    
+
     print(f"\nOutput files in: output/")
     print(f"\nNext steps:")
     print(f"  1. Review KML files in Google Earth (optional)")
@@ -11,36 +11,32 @@ Example:
 import sys
 import re
 
+# Matches "coord1 coord2 ..." lines, skipping blank and ;-comment lines
+_COORD_LINE = re.compile(r'(?m)^[ \t]*([^;\s]\S*)[ \t]+(\S+)')
+
 def convert_to_topsky(input_file, output_file, color="AirspaceA", polygon_type="Boundary"):
     """Convert EuroScope line segments to TopSky polygon"""
-    
+
     coordinates = []
-    
-    # Read input file
+
+    # Scan the whole file with one compiled pattern instead of per-line
+    # strip/split; only the first two tokens of each line are needed
     with open(input_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith(';'):
-                continue
-            
-            # Parse line: coord1 coord2 COLOR ; comment
-            parts = line.split()
-            if len(parts) >= 2:
-                lat = parts[0]
-                lon = parts[1]
-                
-                # Only add if not duplicate (avoid double-adding connection points)
-                coord = (lat, lon)
-                if not coordinates or coordinates[-1] != coord:
-                    coordinates.append(coord)
-    
-    # Write TopSky format
+        data = f.read()
+
+    append = coordinates.append
+    last = None
+    for match in _COORD_LINE.finditer(data):
+        coord = match.groups()
+        # Only add if not duplicate (avoid double-adding connection points)
+        if coord != last:
+            append(coord)
+            last = coord
+
+    # Write TopSky format in one buffered write, closing the polygon
+    # with COORDPOLY
     with open(output_file, 'w') as f:
-        # Write all coordinates
-        for lat, lon in coordinates:
-            f.write(f"COORD:{lat}:{lon}\n")
-        
-        # Close the polygon with COORDPOLY
+        f.write(''.join(f"COORD:{lat}:{lon}\n" for lat, lon in coordinates))
         f.write(f"COORDPOLY:{color}:{polygon_type}\n")
     
     print(f"✓ Converted {len(coordinates)} coordinates")
@@ -1,4 +1,6 @@
 #!/usr/bin/env python3
+import os
+import re
 import sys
 
 if len(sys.argv) != 2:
@@ -7,19 +9,16 @@ if len(sys.argv) != 2:
 
 filename = sys.argv[1]
 
-with open(filename, 'r', encoding='utf-8') as f:
-    content = f.read()
+# Rewrite <n>/</n> to <name>/</name> in a single pass
+pattern = re.compile(r'<(/?)n>')
+tmp_name = filename + '.tmp'
 
-# Replace short tag with full tag
-old_open = chr(60) + 'n' + chr(62)  # <n>
-new_open = chr(60) + 'name' + chr(62)  # <name>
-old_close = chr(60) + '/' + 'n' + chr(62)  # </n>
-new_close = chr(60) + '/' + 'name' + chr(62)  # </name>
+with open(filename, 'r', encoding='utf-8') as f_in, \
+     open(tmp_name, 'w', encoding='utf-8') as f_out:
+    for line in f_in:
+        f_out.write(pattern.sub(r'<\1name>', line))
 
-content = content.replace(old_open, new_open)
-content = content.replace(old_close, new_close)
-
-with open(filename, 'w', encoding='utf-8') as f:
-    f.write(content)
+# Atomic swap so a crash mid-write can't truncate the original
+os.replace(tmp_name, filename)
 
 print(f"Fixed {filename}")
@@ -12,13 +12,55 @@ Outputs:
 """
 
 import sys
+import gzip
+import hashlib
 import json
+import re
 import requests
 import argparse
+from functools import lru_cache
 from math import modf
+from pathlib import Path
+from typing import NamedTuple
 
-def query_overpass(icao_code):
-    """Query Overpass API for airport data inside aerodrome boundary"""
+try:
+    import ijson
+except ImportError:
+    # Optional: without it the full response is decoded in one go
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    # Optional: stdlib json is used when the faster C decoder isn't installed
+    orjson = None
+
+# Overpass responses are cached here so parser iterations don't re-pay the
+# 30-60 s query; pass --refresh to force a new download
+CACHE_DIR = Path.home() / '.cache' / 'mapbuilder'
+
+# Shared session: keeps the TCP/TLS connection alive across queries and
+# requests gzip on the wire (Overpass JSON compresses ~8x)
+SESSION = requests.Session()
+SESSION.headers['Accept-Encoding'] = 'gzip, deflate'
+SESSION.mount('https://', requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=4))
+
+def _iter_cached_elements(cache_file):
+    """Stream elements back out of a cached (gzipped) Overpass response"""
+    f = gzip.open(cache_file, 'rb')
+    if ijson is not None:
+        return ijson.items(f, 'elements.item')
+    with f:
+        raw = f.read()
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    return iter(data.get('elements', []))
+
+def query_overpass(icao_code, refresh=False):
+    """Query Overpass API for airport data inside aerodrome boundary
+
+    Responses are cached on disk keyed by the query text; refresh bypasses
+    the cache.
+    """
     overpass_url = "https://overpass-api.de/api/interpreter"
     
     query = f"""
@@ -46,37 +88,57 @@ def query_overpass(icao_code):
     out skel qt;
     """
     
+    cache_file = CACHE_DIR / f"{hashlib.sha1(query.encode()).hexdigest()}.json.gz"
+    if not refresh and cache_file.exists():
+        print(f"Using cached Overpass response for {icao_code}")
+        return _iter_cached_elements(cache_file)
+
     print(f"Querying OpenStreetMap for {icao_code}...")
-    response = requests.post(overpass_url, data={'data': query}, timeout=120)
+    response = SESSION.post(overpass_url, data={'data': query}, timeout=120, stream=True)
     response.raise_for_status()
-    return response.json()
+
+    # Spool the body straight to the compressed cache file in 1 MB chunks —
+    # the full payload never sits in memory — then stream elements back from
+    # the file (so the parse path is identical for hits and misses)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_suffix('.tmp')
+    with gzip.open(tmp_file, 'wb') as f:
+        for chunk in response.iter_content(chunk_size=1 << 20):
+            f.write(chunk)
+    tmp_file.replace(cache_file)
+    return _iter_cached_elements(cache_file)
+
+# Common hangar misspellings, matched in one pass
+_HANGAR_RE = re.compile(r'[Hh](?:anger|agner)')
+
+def _fix_hangar(match):
+    return 'Hangar' if match.group(0)[0] == 'H' else 'hangar'
 
 def normalize_hangar_name(name):
     """Normalize hangar misspellings"""
-    if not name:
+    if not name or ('H' not in name and 'h' not in name):
         return name
-    name = name.replace('Hanger', 'Hangar')
-    name = name.replace('hanger', 'hangar')
-    name = name.replace('Hagner', 'Hangar')
-    name = name.replace('hagner', 'hangar')
-    return name
+    return _HANGAR_RE.sub(_fix_hangar, name)
 
-def decimal_to_dms(decimal_degrees, is_latitude):
-    """Convert decimal degrees to DMS format: N044.51.54.928 or W063.31.43.784"""
-    is_positive = decimal_degrees >= 0
-    decimal_degrees = abs(decimal_degrees)
-    
+def _split_dms(decimal_degrees):
+    """Split absolute decimal degrees into (degrees, minutes, seconds)"""
     degrees = int(decimal_degrees)
     minutes_decimal = (decimal_degrees - degrees) * 60
     minutes = int(minutes_decimal)
     seconds = (minutes_decimal - minutes) * 60
-    
+    return degrees, minutes, seconds
+
+@lru_cache(maxsize=None)
+def decimal_to_dms(decimal_degrees, is_latitude):
+    """Convert decimal degrees to DMS format: N044.51.54.928 or W063.31.43.784"""
+    is_positive = decimal_degrees >= 0
+    degrees, minutes, seconds = _split_dms(abs(decimal_degrees))
+
     if is_latitude:
         direction = 'N' if is_positive else 'S'
-        return f"{direction}{degrees:03d}.{minutes:02d}.{seconds:06.3f}"
     else:
         direction = 'E' if is_positive else 'W'
-        return f"{direction}{degrees:03d}.{minutes:02d}.{seconds:06.3f}"
+    return f"{direction}{degrees:03d}.{minutes:02d}.{seconds:06.3f}"
 
 def format_coordinate(lon, lat):
     """Format coordinate pair as EuroScope DMS"""
@@ -84,136 +146,102 @@ def format_coordinate(lon, lat):
     lon_dms = decimal_to_dms(lon, False)
     return f"{lat_dms} {lon_dms}"
 
-def parse_osm_data(osm_data):
-    """Parse OSM JSON into categorized features"""
+def format_coordinates(coords, cache):
+    """Bulk-convert a list of (lon, lat) pairs to EuroScope DMS strings
+
+    One tight loop with the DMS math inlined, so converting a whole way
+    avoids the per-coordinate function-call overhead of format_coordinate.
+    The cache is shared across ways: vertices reused between features
+    (taxiway junctions, adjoining polygons) are only ever formatted once.
+    """
+    out = []
+    append = out.append
+    get = cache.get
+    for pair in coords:
+        cached = get(pair)
+        if cached is not None:
+            append(cached)
+            continue
+
+        lon, lat = pair
+        if lat >= 0:
+            ns = 'N'
+        else:
+            ns = 'S'
+            lat = -lat
+        d = int(lat)
+        m_dec = (lat - d) * 60
+        m = int(m_dec)
+        s = (m_dec - m) * 60
+        lat_dms = f"{ns}{d:03d}.{m:02d}.{s:06.3f}"
+
+        if lon >= 0:
+            ew = 'E'
+        else:
+            ew = 'W'
+            lon = -lon
+        d = int(lon)
+        m_dec = (lon - d) * 60
+        m = int(m_dec)
+        s = (m_dec - m) * 60
+        cache[pair] = formatted = f"{lat_dms} {ew}{d:03d}.{m:02d}.{s:06.3f}"
+        append(formatted)
+    return out
+
+# Way classification table: (tag key, tag value) -> (bucket, type, color,
+# sort order, fixed name). A '*' value matches any value of that key; a fixed
+# name of None means the feature is named from the element's own tags.
+WAY_DISPATCH = {
+    ('aeroway', 'runway'):    ('lines', 'runway', 'COLOR_RunwayBorder', 0, None),
+    ('aeroway', 'taxiway'):   ('lines', 'taxiway', 'COLOR_TaxiwayYellow', 1, None),
+    ('aeroway', 'taxilane'):  ('lines', 'taxilane', 'COLOR_TaxiwayGrey', 2, None),
+    ('aeroway', 'apron'):     ('areas', 'apron', 'COLOR_ApronSurface', 0, None),
+    ('aeroway', 'hangar'):    ('areas', 'hangar', 'COLOR_Building', 1, None),
+    ('building', 'hangar'):   ('areas', 'hangar', 'COLOR_Building', 1, None),
+    ('building', '*'):        ('areas', 'building', 'COLOR_Building', 2, None),
+    ('natural', 'wood'):      ('areas', 'wood', 'COLOR_GrasSurface', 3, 'woods'),
+    ('natural', 'grassland'): ('areas', 'grass', 'COLOR_GrasSurface', 3, 'grass'),
+    ('landuse', 'grass'):     ('areas', 'grass', 'COLOR_GrasSurface', 3, 'grass'),
+    # Water is drawn as grass surface
+    ('natural', 'water'):     ('areas', 'water', 'COLOR_GrasSurface', 4, 'water'),
+    ('water', '*'):           ('areas', 'water', 'COLOR_GrasSurface', 4, 'water'),
+    ('waterway', '*'):        ('areas', 'water', 'COLOR_GrasSurface', 4, 'water'),
+}
+
+# Keys are probed in the same priority order the old if/elif chain used
+_WAY_TAG_KEYS = ('aeroway', 'building', 'natural', 'landuse', 'water', 'waterway')
+
+class Feature(NamedTuple):
+    """One drawable line or area; far lighter than a per-feature dict"""
+    type: str
+    color: str
+    coords: list
+    coord_strs: list
+    name: str
+    sort_order: int
+
+def parse_osm_data(elements):
+    """Parse a stream of OSM elements into categorized features"""
     nodes = {}
     features = {
         'lines': [],
         'areas': [],
         'labels': []
     }
-    
-    # First pass: collect all nodes
-    for element in osm_data.get('elements', []):
+
+    # Single pass over the stream: collect nodes as they arrive and defer
+    # ways until the end, since a way may reference nodes emitted after it
+    pending_ways = []
+
+    for element in elements:
         if element['type'] == 'node':
-            nodes[element['id']] = {
-                'lat': element['lat'],
-                'lon': element['lon']
-            }
-    
-    # Second pass: process ways and nodes with tags
-    for element in osm_data.get('elements', []):
-        if element['type'] == 'way':
-            tags = element.get('tags', {})
-            aeroway = tags.get('aeroway')
-            building = tags.get('building')
-            natural = tags.get('natural')
-            landuse = tags.get('landuse')
-            water = tags.get('water')
-            waterway = tags.get('waterway')
-            
-            # Build coordinate list
-            coords = []
-            for node_id in element['nodes']:
-                if node_id in nodes:
-                    node = nodes[node_id]
-                    coords.append((node['lon'], node['lat']))
-            
-            if not coords:
-                continue
-            
-            is_closed = element['nodes'][0] == element['nodes'][-1]
-            name = tags.get('name', tags.get('ref', ''))
-            
-            # Lines (not closed ways)
-            if aeroway == 'runway' and not is_closed:
-                features['lines'].append({
-                    'type': 'runway',
-                    'color': 'COLOR_RunwayBorder',
-                    'coords': coords,
-                    'name': name or 'runway',
-                    'sort_order': 0
-                })
-            
-            elif aeroway == 'taxiway' and not is_closed:
-                features['lines'].append({
-                    'type': 'taxiway',
-                    'color': 'COLOR_TaxiwayYellow',
-                    'coords': coords,
-                    'name': name or 'taxiway',
-                    'sort_order': 1
-                })
-            
-            elif aeroway == 'taxilane' and not is_closed:
-                features['lines'].append({
-                    'type': 'taxilane',
-                    'color': 'COLOR_TaxiwayGrey',
-                    'coords': coords,
-                    'name': name or 'taxilane',
-                    'sort_order': 2
-                })
-            
-            # Areas (closed ways/polygons)
-            elif aeroway == 'apron':
-                features['areas'].append({
-                    'type': 'apron',
-                    'color': 'COLOR_ApronSurface',
-                    'coords': coords,
-                    'name': name or 'apron',
-                    'sort_order': 0
-                })
-            
-            elif aeroway == 'hangar' or building == 'hangar':
-                hangar_name = normalize_hangar_name(name) or 'Hangar'
-                features['areas'].append({
-                    'type': 'hangar',
-                    'color': 'COLOR_Building',
-                    'coords': coords,
-                    'name': hangar_name,
-                    'sort_order': 1
-                })
-            
-            elif building:
-                building_name = normalize_hangar_name(name) or building
-                features['areas'].append({
-                    'type': 'building',
-                    'color': 'COLOR_Building',
-                    'coords': coords,
-                    'name': building_name,
-                    'sort_order': 2
-                })
-            
-            elif natural == 'wood':
-                features['areas'].append({
-                    'type': 'wood',
-                    'color': 'COLOR_GrasSurface',
-                    'coords': coords,
-                    'name': 'woods',
-                    'sort_order': 3
-                })
-            
-            elif natural == 'grassland' or landuse == 'grass':
-                features['areas'].append({
-                    'type': 'grass',
-                    'color': 'COLOR_GrasSurface',
-                    'coords': coords,
-                    'name': 'grass',
-                    'sort_order': 3
-                })
-            
-            elif natural == 'water' or water or waterway:
-                features['areas'].append({
-                    'type': 'water',
-                    'color': 'COLOR_GrasSurface',  # Water as grass surface
-                    'coords': coords,
-                    'name': 'water',
-                    'sort_order': 4
-                })
-        
-        elif element['type'] == 'node':
+            # Flat (lon, lat) tuple: much lighter than a per-node dict and
+            # already in the shape the way loop needs
+            nodes[element['id']] = (element['lon'], element['lat'])
+
             tags = element.get('tags', {})
             aeroway = tags.get('aeroway')
-            
+
             if aeroway in ['gate', 'parking_position', 'stand']:
                 ref = tags.get('ref', tags.get('name', '?'))
                 features['labels'].append({
@@ -222,63 +250,127 @@ def parse_osm_data(osm_data):
                     'lat': element['lat'],
                     'lon': element['lon']
                 })
-    
+
+        elif element['type'] == 'way':
+            pending_ways.append(element)
+
+    # Resolve way geometry now that all nodes are known; the format cache is
+    # shared so each distinct vertex is stringified exactly once
+    fmt_cache = {}
+    for element in pending_ways:
+        tags = element.get('tags', {})
+
+        # Build coordinate list
+        coords = [nodes[node_id] for node_id in element['nodes'] if node_id in nodes]
+
+        if not coords:
+            continue
+
+        is_closed = element['nodes'][0] == element['nodes'][-1]
+
+        # Single table lookup per tag key instead of the old if/elif chain;
+        # line specs only apply to open ways, so closed ways fall through to
+        # the remaining keys (e.g. a closed way tagged building)
+        spec = None
+        for key in _WAY_TAG_KEYS:
+            value = tags.get(key)
+            if value is None:
+                continue
+            spec = WAY_DISPATCH.get((key, value)) or WAY_DISPATCH.get((key, '*'))
+            if spec is not None:
+                if spec[0] == 'lines' and is_closed:
+                    spec = None
+                    continue
+                break
+
+        if spec is None:
+            continue
+
+        bucket, feature_type, color, sort_order, fixed_name = spec
+
+        if fixed_name is not None:
+            name = fixed_name
+        else:
+            name = tags.get('name', tags.get('ref', ''))
+            if feature_type == 'hangar':
+                name = normalize_hangar_name(name) or 'Hangar'
+            elif feature_type == 'building':
+                name = normalize_hangar_name(name) or tags.get('building')
+            else:
+                name = name or feature_type
+
+        features[bucket].append(Feature(
+            type=feature_type,
+            color=color,
+            coords=coords,
+            coord_strs=format_coordinates(coords, fmt_cache),
+            name=name,
+            sort_order=sort_order,
+        ))
+
     # Sort features
-    features['lines'].sort(key=lambda x: (x['sort_order'], x['name']))
-    features['areas'].sort(key=lambda x: (x['sort_order'], x['name']))
+    features['lines'].sort(key=lambda f: (f.sort_order, f.name))
+    features['areas'].sort(key=lambda f: (f.sort_order, f.name))
     features['labels'].sort(key=lambda x: x['ref'])
     
     return features
 
 def write_lines_file(features, output_file):
     """Write lines (SCT Entries) in EuroScope format"""
+    # Assemble everything in memory and issue a single write, instead of
+    # one f.write per segment
+    parts = []
+    append = parts.append
+    # %-formatting beats an f-string in the per-segment loop: no per-field
+    # format-spec traversal, just three string substitutions
+    segment_fmt = "%s %s %s\n"
+    for feature in features['lines']:
+        # Coordinates were stringified during parsing; pair up segments
+        coord_strs = feature.coord_strs
+        if len(coord_strs) < 2:
+            continue
+
+        # Comment line with feature name
+        append(f";{feature.name}\n")
+
+        color = feature.color
+        for i in range(len(coord_strs) - 1):
+            append(segment_fmt % (coord_strs[i], coord_strs[i + 1], color))
+
     with open(output_file, 'w', encoding='utf-8') as f:
-        for feature in features['lines']:
-            # Convert polyline to point-to-point segments
-            coords = feature['coords']
-            for i in range(len(coords) - 1):
-                lon1, lat1 = coords[i]
-                lon2, lat2 = coords[i + 1]
-                
-                coord1 = format_coordinate(lon1, lat1)
-                coord2 = format_coordinate(lon2, lat2)
-                
-                # Comment line with feature name
-                if i == 0:
-                    f.write(f";{feature['name']}\n")
-                
-                # Line segment
-                f.write(f"{coord1} {coord2} {feature['color']}\n")
-    
+        f.write(''.join(parts))
+
     print(f"  Lines: {len(features['lines'])} features written to {output_file}")
 
 def write_areas_file(features, output_file):
     """Write areas (Regions) in EuroScope format"""
+    parts = []
+    append = parts.append
+    for feature in features['areas']:
+        # Comment with feature name, then color line
+        append(f";\n;{feature.name}\n;\n")
+        append(f"{feature.color}\n")
+
+        # Coordinates (one per line)
+        for coord in feature.coord_strs:
+            append(f"{coord}\n")
+
+        # End marker
+        append(";\n")
+
     with open(output_file, 'w', encoding='utf-8') as f:
-        for feature in features['areas']:
-            # Comment with feature name
-            f.write(f";\n;{feature['name']}\n;\n")
-            
-            # Color line
-            f.write(f"{feature['color']}\n")
-            
-            # Coordinates (one per line)
-            for lon, lat in feature['coords']:
-                coord = format_coordinate(lon, lat)
-                f.write(f"{coord}\n")
-            
-            # End marker
-            f.write(";\n")
-    
+        f.write(''.join(parts))
+
     print(f"  Areas: {len(features['areas'])} features written to {output_file}")
 
 def write_labels_file(features, output_file):
     """Write labels in EuroScope format"""
     with open(output_file, 'w', encoding='utf-8') as f:
-        for label in features['labels']:
-            coord = format_coordinate(label['lon'], label['lat'])
-            f.write(f'"{label["ref"]}" {coord} {label["type"]}\n')
-    
+        f.write(''.join(
+            f'"{label["ref"]}" {format_coordinate(label["lon"], label["lat"])} {label["type"]}\n'
+            for label in features['labels']
+        ))
+
     print(f"  Labels: {len(features['labels'])} features written to {output_file}")
 
 def main():
@@ -288,18 +380,20 @@ def main():
     parser.add_argument('icao', help='ICAO code (e.g., CYHZ)')
     parser.add_argument('--name', required=True, help='Airport name (for logging)')
     parser.add_argument('--output-dir', default='.', help='Output directory (default: current)')
-    
+    parser.add_argument('--refresh', action='store_true',
+                        help='Bypass the on-disk Overpass cache')
+
     args = parser.parse_args()
-    
+
     icao = args.icao.upper()
-    
+
     try:
         # Query OSM
-        osm_data = query_overpass(icao)
-        
+        elements = query_overpass(icao, refresh=args.refresh)
+
         # Parse features
         print(f"Parsing features...")
-        features = parse_osm_data(osm_data)
+        features = parse_osm_data(elements)
         
         print(f"\nFound:")
         print(f"  Lines: {len(features['lines'])}")
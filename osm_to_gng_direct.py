@@ -7,11 +7,22 @@ Usage: python osm_to_gng_direct.py CYHZ --name "Halifax" --fir CZQM
 """
 
 import sys
+import gzip
+import hashlib
 import json
+import time
 import requests
 import argparse
-from xml.etree.ElementTree import Element, SubElement, tostring
-from xml.dom import minidom
+from itertools import chain
+from pathlib import Path
+from requests.adapters import HTTPAdapter, Retry
+from xml.sax.saxutils import XMLGenerator, escape
+
+try:
+    import orjson
+except ImportError:
+    # Optional: stdlib json is used when the faster C decoder isn't installed
+    orjson = None
 
 # GNG Color definitions
 GNG_COLORS = {
@@ -24,6 +35,23 @@ GNG_COLORS = {
     'Labels': 'ffcc33ff',
 }
 
+# Repeat runs within the TTL read the gzipped response from disk instead of
+# re-querying Overpass; airport ground layouts change slowly enough that a
+# week-old response is fine for iterating on the converter
+CACHE_DIR = Path.home() / '.cache' / 'mapbuilder'
+CACHE_TTL = 7 * 24 * 3600
+
+# Keep-alive session shared across queries: repeated invocations (batch runs)
+# reuse the TCP+TLS connection, gzip cuts Overpass JSON ~10-20x on the wire
+# (requests auto-decompresses), and transient server errors retry with backoff
+SESSION = requests.Session()
+SESSION.headers.update({
+    'Accept-Encoding': 'gzip, deflate',
+    'User-Agent': 'mapbuilder/1.0',
+})
+SESSION.mount('https://', HTTPAdapter(
+    max_retries=Retry(total=3, backoff_factor=1, status_forcelist=[429, 502, 503, 504])))
+
 def query_overpass(icao_code):
     """Query Overpass API for airport data inside aerodrome boundary"""
     overpass_url = "https://overpass-api.de/api/interpreter"
@@ -37,26 +65,44 @@ def query_overpass(icao_code):
     );
     map_to_area->.a;
     
-    // Get features inside the aerodrome
+    // Get features inside the aerodrome, restricted to the tag values the
+    // dispatch table actually handles — anything else would be fetched,
+    // decoded and then dropped client-side
     (
-      way["aeroway"](area.a);
-      node["aeroway"](area.a);
+      way["aeroway"~"^(runway|taxiway|taxilane|apron|hangar)$"](area.a);
+      node["aeroway"~"^(gate|parking_position|stand)$"](area.a);
       way["building"](area.a);
-      way["natural"](area.a);
-      way["landuse"](area.a);
+      way["natural"~"^(wood|grassland|water)$"](area.a);
+      way["landuse"="grass"](area.a);
       way["water"](area.a);
       way["waterway"](area.a);
     );
-    
-    out body;
-    >;
-    out skel qt;
+
+    // out geom embeds each way's vertex coordinates, so the response carries
+    // no skeleton-node block (~half the payload) and the client needs no
+    // node-id join
+    out geom;
     """
     
+    cache_file = CACHE_DIR / f"{icao_code}-{hashlib.sha256(query.encode()).hexdigest()[:16]}.json.gz"
+    if cache_file.exists() and time.time() - cache_file.stat().st_mtime < CACHE_TTL:
+        print(f"Using cached Overpass response for {icao_code}...")
+        with gzip.open(cache_file, 'rb') as f:
+            raw = f.read()
+        return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
     print(f"Querying OpenStreetMap for {icao_code} (inside aerodrome boundary only)...")
-    response = requests.post(overpass_url, data={'data': query}, timeout=120)
+    response = SESSION.post(overpass_url, data={'data': query}, timeout=120)
     response.raise_for_status()
-    return response.json()
+
+    # Write-then-rename so an interrupted run can't leave a truncated cache
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_suffix('.tmp')
+    with gzip.open(tmp_file, 'wb') as f:
+        f.write(response.content)
+    tmp_file.replace(cache_file)
+
+    return orjson.loads(response.content) if orjson is not None else response.json()
 
 def normalize_hangar_name(name):
     """Normalize hangar misspellings"""
@@ -69,194 +115,146 @@ def normalize_hangar_name(name):
     name = name.replace('hagner', 'hangar')
     return name
 
-def create_gng_styles(doc):
-    """Create GNG color style definitions"""
+# Pre-rendered <Style> block, filled in once per color; replaces ~15
+# SubElement calls and a tree serialization per style with one str.format
+_STYLE_TEMPLATE = """\
+    <Style id="{id}">
+      <IconStyle>
+        <hotSpot x="19" y="0" xunits="pixels" yunits="pixels"/>
+        <color>{color}</color>
+        <colorMode>normal</colorMode>
+        <scale>1</scale>
+        <Icon>
+          <href>https://maps.google.com/mapfiles/kml/pushpin/ylw-pushpin.png</href>
+        </Icon>
+      </IconStyle>
+      <PolyStyle>
+        <color>{poly}</color>
+        <fill>1</fill>
+        <outline>0</outline>
+      </PolyStyle>
+      <LineStyle>
+        <color>{line}</color>
+        <colorMode>normal</colorMode>
+        <width>2</width>
+      </LineStyle>
+    </Style>"""
+
+def write_gng_styles(f):
+    """Write the GNG color style definitions"""
     for color_name, color_value in GNG_COLORS.items():
-        style = SubElement(doc, 'Style', id=color_name)
-        
-        # Icon style
-        icon_style = SubElement(style, 'IconStyle')
-        SubElement(icon_style, 'hotSpot', x="19", y="0", xunits="pixels", yunits="pixels")
-        SubElement(icon_style, 'color').text = color_value
-        SubElement(icon_style, 'colorMode').text = 'normal'
-        SubElement(icon_style, 'scale').text = '1'
-        icon = SubElement(icon_style, 'Icon')
-        SubElement(icon, 'href').text = 'https://maps.google.com/mapfiles/kml/pushpin/ylw-pushpin.png'
-        
-        # Poly style
-        poly_style = SubElement(style, 'PolyStyle')
-        SubElement(poly_style, 'color').text = color_value.replace('ff', 'cc')  # Semi-transparent
-        SubElement(poly_style, 'fill').text = '1'
-        SubElement(poly_style, 'outline').text = '0'
-        
-        # Line style
-        line_style = SubElement(style, 'LineStyle')
-        SubElement(line_style, 'color').text = color_value
-        SubElement(line_style, 'colorMode').text = 'normal'
-        SubElement(line_style, 'width').text = '2'
-
-def create_folder_hierarchy(parent, icao, airport_name, fir='CZQM'):
-    """Create the GNG folder hierarchy: FIR > ICAO > Airport"""
-    fir_folder = SubElement(parent, 'Folder')
-    SubElement(fir_folder, 'name').text = fir
-    SubElement(fir_folder, 'visibility').text = '1'
-    
-    icao_folder = SubElement(fir_folder, 'Folder')
-    SubElement(icao_folder, 'name').text = icao
-    SubElement(icao_folder, 'visibility').text = '1'
-    
-    airport_folder = SubElement(icao_folder, 'Folder')
-    SubElement(airport_folder, 'name').text = airport_name
-    SubElement(airport_folder, 'visibility').text = '1'
-    
-    return airport_folder
+        f.write('\n' + _STYLE_TEMPLATE.format(
+            id=color_name,
+            color=color_value,
+            poly='cc' + color_value[2:],  # Semi-transparent
+            line=color_value))
+
+# One dict probe per tag key replaces the old if/elif ladder over six
+# tags.get() calls per way; '*' matches any value of the key
+WAY_DISPATCH = {
+    # (tag key, tag value) -> (bucket, type, color, sort order, fixed name)
+    ('aeroway', 'runway'):    ('lines', 'runway',   'RunwayBorder',  0, None),
+    ('aeroway', 'taxiway'):   ('lines', 'taxiway',  'TaxiwayYellow', 1, None),
+    ('aeroway', 'taxilane'):  ('lines', 'taxilane', 'TaxiwayGrey',   2, None),
+    ('aeroway', 'apron'):     ('areas', 'apron',    'ApronSurface',  0, None),
+    ('aeroway', 'hangar'):    ('areas', 'hangar',   'Building',      1, None),
+    ('building', 'hangar'):   ('areas', 'hangar',   'Building',      1, None),
+    ('building', '*'):        ('areas', 'building', 'Building',      2, None),
+    ('natural', 'wood'):      ('areas', 'wood',     'GrasSurface',   3, 'woods'),
+    ('natural', 'grassland'): ('areas', 'grass',    'GrasSurface',   3, 'grass'),
+    ('landuse', 'grass'):     ('areas', 'grass',    'GrasSurface',   3, 'grass'),
+    # Water is mapped to GrasSurface (as requested)
+    ('natural', 'water'):     ('areas', 'water',    'GrasSurface',   4, 'water'),
+    ('water', '*'):           ('areas', 'water',    'GrasSurface',   4, 'water'),
+    ('waterway', '*'):        ('areas', 'water',    'GrasSurface',   4, 'water'),
+}
+
+# Probe order preserves the precedence of the old chain
+_WAY_TAG_KEYS = ('aeroway', 'building', 'natural', 'landuse', 'water', 'waterway')
 
 def parse_osm_data(osm_data):
     """Parse OSM JSON into categorized features"""
-    nodes = {}
     features = {
         'lines': [],      # For SCT Entries (LineStrings)
         'areas': [],      # For Regions (Polygons)
         'points': []      # For Labels (Points)
     }
-    
-    # First pass: collect all nodes
+
+    # Single pass: `out geom;` embeds each way's vertex coordinates, so there
+    # is no node table to build and no deferred resolution step
     for element in osm_data.get('elements', []):
         if element['type'] == 'node':
-            nodes[element['id']] = {
-                'lat': element['lat'],
-                'lon': element['lon']
-            }
-    
-    # Second pass: process ways and nodes with tags
-    for element in osm_data.get('elements', []):
-        if element['type'] == 'way':
-            tags = element.get('tags', {})
-            aeroway = tags.get('aeroway')
-            building = tags.get('building')
-            natural = tags.get('natural')
-            landuse = tags.get('landuse')
-            water = tags.get('water')
-            waterway = tags.get('waterway')
-            
-            # Build coordinate list
-            coords = []
-            for node_id in element['nodes']:
-                if node_id in nodes:
-                    node = nodes[node_id]
-                    coords.append((node['lon'], node['lat']))
-            
-            if not coords:
+            tags = element.get('tags')
+            if tags:
+                aeroway = tags.get('aeroway')
+                if aeroway in ['gate', 'parking_position', 'stand']:
+                    # Gate/parking → Labels; `or` skips the fallback lookups
+                    # when the first key hits
+                    ref = tags.get('ref') or tags.get('name') or '?'
+                    features['points'].append({
+                        'type': aeroway,
+                        'ref': ref,
+                        'lat': element['lat'],
+                        'lon': element['lon']
+                    })
+            continue
+
+        if element['type'] != 'way':
+            continue
+
+        tags = element.get('tags', {})
+        get = tags.get
+
+        is_closed = element['nodes'][0] == element['nodes'][-1]
+
+        # Line specs (centerlines → SCT Entries) only apply to open ways;
+        # a closed way keeps scanning so e.g. a closed taxiway that is also
+        # a building still lands in Regions
+        spec = None
+        for key in _WAY_TAG_KEYS:
+            value = get(key)
+            if value is None:
                 continue
-            
-            is_closed = element['nodes'][0] == element['nodes'][-1]
-            name = tags.get('name', tags.get('ref', ''))
-            
-            # Aeroway features
-            if aeroway == 'taxiway' and not is_closed:
-                # Taxiway centerline → SCT Entries
-                features['lines'].append({
-                    'type': 'taxiway',
-                    'color': 'TaxiwayYellow',
-                    'coords': coords,
-                    'name': name or 'taxiway',
-                    'sort_order': 1
-                })
-            
-            elif aeroway == 'taxilane' and not is_closed:
-                # Taxilane centerline → SCT Entries
-                features['lines'].append({
-                    'type': 'taxilane',
-                    'color': 'TaxiwayGrey',
-                    'coords': coords,
-                    'name': name or 'taxilane',
-                    'sort_order': 2
-                })
-            
-            elif aeroway == 'runway' and not is_closed:
-                # Runway centerline → SCT Entries
-                features['lines'].append({
-                    'type': 'runway',
-                    'color': 'RunwayBorder',
-                    'coords': coords,
-                    'name': name or 'runway',
-                    'sort_order': 0
-                })
-            
-            elif aeroway == 'apron':
-                # Apron area → Regions
-                features['areas'].append({
-                    'type': 'apron',
-                    'color': 'ApronSurface',
-                    'coords': coords,
-                    'name': name or 'apron',
-                    'sort_order': 0
-                })
-            
-            elif aeroway == 'hangar' or building == 'hangar':
-                # Hangar → Regions (normalize name)
-                hangar_name = normalize_hangar_name(name) or 'Hangar'
-                features['areas'].append({
-                    'type': 'hangar',
-                    'color': 'Building',
-                    'coords': coords,
-                    'name': hangar_name,
-                    'sort_order': 1
-                })
-            
-            elif building:
-                # Other buildings → Regions
-                building_name = normalize_hangar_name(name) or building
-                features['areas'].append({
-                    'type': 'building',
-                    'color': 'Building',
-                    'coords': coords,
-                    'name': building_name,
-                    'sort_order': 2
-                })
-            
-            # Natural features → Regions (all as GrasSurface)
-            elif natural == 'wood':
-                features['areas'].append({
-                    'type': 'wood',
-                    'color': 'GrasSurface',
-                    'coords': coords,
-                    'name': 'woods',
-                    'sort_order': 3
-                })
-            
-            elif natural == 'grassland' or landuse == 'grass':
-                features['areas'].append({
-                    'type': 'grass',
-                    'color': 'GrasSurface',
-                    'coords': coords,
-                    'name': 'grass',
-                    'sort_order': 3
-                })
-            
-            elif natural == 'water' or water or waterway:
-                # Map water to GrasSurface (as requested)
-                features['areas'].append({
-                    'type': 'water',
-                    'color': 'GrasSurface',
-                    'coords': coords,
-                    'name': 'water',
-                    'sort_order': 4
-                })
-        
-        elif element['type'] == 'node':
-            tags = element.get('tags', {})
-            aeroway = tags.get('aeroway')
-            
-            if aeroway in ['gate', 'parking_position', 'stand']:
-                # Gate/parking → Labels
-                ref = tags.get('ref', tags.get('name', '?'))
-                features['points'].append({
-                    'type': aeroway,
-                    'ref': ref,
-                    'lat': element['lat'],
-                    'lon': element['lon']
-                })
+            spec = WAY_DISPATCH.get((key, value)) or WAY_DISPATCH.get((key, '*'))
+            if spec is not None:
+                if spec[0] == 'lines' and is_closed:
+                    spec = None
+                    continue
+                break
+
+        if spec is None:
+            continue
+
+        # Build the coordinate list only for ways that matched a spec
+        coords = [(g['lon'], g['lat']) for g in element.get('geometry', [])]
+
+        if not coords:
+            continue
+
+        bucket, feature_type, color, sort_order, fixed_name = spec
+        # `or` short-circuits the ref lookup when a name is present
+        name = get('name') or get('ref') or ''
+
+        if fixed_name is not None:
+            feature_name = fixed_name
+        elif feature_type == 'hangar':
+            # Hangar → Regions (normalize name)
+            feature_name = normalize_hangar_name(name) or 'Hangar'
+        elif feature_type == 'building':
+            feature_name = normalize_hangar_name(name) or tags['building']
+        else:
+            feature_name = name or feature_type
+
+        features[bucket].append({
+            'type': feature_type,
+            'color': color,
+            'coords': coords,
+            # Node-id key identifies shared geometry (e.g. a runway way that
+            # feeds both a centerline and a surface) for the formatting cache
+            'node_key': tuple(element['nodes']),
+            'name': feature_name,
+            'sort_order': sort_order
+        })
     
     # Sort features by type within each category
     features['lines'].sort(key=lambda x: (x['sort_order'], x['name']))
@@ -265,143 +263,186 @@ def parse_osm_data(osm_data):
     
     return features
 
-def create_sct_entries_section(parent, features, icao, airport_name, fir):
-    """Create SCT Entries section (Lines)"""
-    sct_folder = SubElement(parent, 'Folder', id="SCT Entries")
-    SubElement(sct_folder, 'name').text = 'SCT Entries'
-    SubElement(sct_folder, 'visibility').text = '1'
-    
-    # Create hierarchy: FIR > ICAO > Groundlayout > Airport
-    fir_folder = SubElement(sct_folder, 'Folder')
-    SubElement(fir_folder, 'name').text = fir
-    SubElement(fir_folder, 'visibility').text = '1'
-    
-    icao_folder = SubElement(fir_folder, 'Folder')
-    SubElement(icao_folder, 'name').text = icao
-    SubElement(icao_folder, 'visibility').text = '1'
-    
-    groundlayout = SubElement(icao_folder, 'Folder')
-    SubElement(groundlayout, 'name').text = 'Groundlayout'
-    SubElement(groundlayout, 'visibility').text = '1'
-    
-    airport_folder = SubElement(groundlayout, 'Folder')
-    SubElement(airport_folder, 'name').text = airport_name
-    SubElement(airport_folder, 'visibility').text = '1'
-    
-    # Add line features (already sorted)
+# The per-feature sections are emitted through an XMLGenerator rather than
+# built as Element trees: an airport produces thousands of near-identical
+# Placemarks, and streaming them skips one Element (attrib dict + child list)
+# allocation per tag plus the full-tree serialization afterwards.
+
+def _start(writer, depth, tag, attrs=None):
+    writer.characters('\n' + '  ' * depth)
+    writer.startElement(tag, attrs or {})
+
+def _end(writer, depth, tag):
+    writer.characters('\n' + '  ' * depth)
+    writer.endElement(tag)
+
+def _leaf(writer, depth, tag, text):
+    writer.characters('\n' + '  ' * depth)
+    writer.startElement(tag, {})
+    writer.characters(text)
+    writer.endElement(tag)
+
+def _open_folders(writer, depth, names, folder_id=None):
+    """Open nested <Folder> scaffolding; returns the depth inside the innermost"""
+    for name in names:
+        attrs = {'id': folder_id} if folder_id else {}
+        folder_id = None
+        _start(writer, depth, 'Folder', attrs)
+        _leaf(writer, depth + 1, 'name', name)
+        _leaf(writer, depth + 1, 'visibility', '1')
+        depth += 1
+    return depth
+
+def _close_folders(writer, depth, count):
+    for d in range(depth + count - 1, depth - 1, -1):
+        _end(writer, d, 'Folder')
+
+def _emit_placemark(writer, depth, name, style, geom_tag, coords):
+    """Emit one Placemark: shared boilerplate plus its geometry element"""
+    _start(writer, depth, 'Placemark')
+    _leaf(writer, depth + 1, 'name', name)
+    _leaf(writer, depth + 1, 'description', style)
+    _leaf(writer, depth + 1, 'styleUrl', f"#{style}")
+    _leaf(writer, depth + 1, 'visibility', '1')
+    _start(writer, depth + 1, geom_tag)
+    if geom_tag == 'Point':
+        _leaf(writer, depth + 2, 'coordinates', coords)
+    else:
+        _leaf(writer, depth + 2, 'tessellate', '1')
+        _leaf(writer, depth + 2, 'altitudeMode', 'clampToGround')
+        if geom_tag == 'Polygon':
+            _start(writer, depth + 2, 'outerBoundaryIs')
+            _start(writer, depth + 3, 'LinearRing')
+            _leaf(writer, depth + 4, 'coordinates', coords)
+            _end(writer, depth + 3, 'LinearRing')
+            _end(writer, depth + 2, 'outerBoundaryIs')
+        else:
+            _leaf(writer, depth + 2, 'coordinates', coords)
+    _end(writer, depth + 1, geom_tag)
+    _end(writer, depth, 'Placemark')
+
+def _coord_string(feature, cache):
+    """Format a feature's vertices, reusing strings for shared geometries"""
+    key = feature['node_key']
+    try:
+        return cache[key]
+    except KeyError:
+        coords = feature['coords']
+        # One C-level %-format for the whole feature instead of a Python
+        # f-string per vertex; OSM coordinates carry at most 7 decimals
+        template = "%.7f,%.7f,0 " * len(coords)
+        cache[key] = s = template[:-1] % tuple(chain.from_iterable(coords))
+        return s
+
+def stream_sct_entries(writer, features, icao, airport_name, fir, coord_cache):
+    """Stream SCT Entries section (Lines)"""
+    # Hierarchy: FIR > ICAO > Groundlayout > Airport
+    depth = _open_folders(writer, 2, ['SCT Entries', fir, icao, 'Groundlayout', airport_name],
+                          folder_id='SCT Entries')
+
+    # Line features are already sorted
     for i, feature in enumerate(features['lines'], 1):
-        placemark = SubElement(airport_folder, 'Placemark')
-        SubElement(placemark, 'name').text = f"{feature['color']} {i})"
-        SubElement(placemark, 'description').text = feature['color']
-        SubElement(placemark, 'styleUrl').text = f"#{feature['color']}"
-        SubElement(placemark, 'visibility').text = '1'
-        
-        linestring = SubElement(placemark, 'LineString')
-        SubElement(linestring, 'tessellate').text = '1'
-        SubElement(linestring, 'altitudeMode').text = 'clampToGround'
-        
-        coord_string = ' '.join([f"{lon},{lat},0" for lon, lat in feature['coords']])
-        SubElement(linestring, 'coordinates').text = coord_string
-
-def create_regions_section(parent, features, icao, airport_name, fir):
-    """Create Regions section (Polygons)"""
-    regions_folder = SubElement(parent, 'Folder', id="Regions")
-    SubElement(regions_folder, 'name').text = 'Regions'
-    SubElement(regions_folder, 'visibility').text = '1'
-    
-    # Create hierarchy: FIR > ICAO > Airport
-    fir_folder = SubElement(regions_folder, 'Folder')
-    SubElement(fir_folder, 'name').text = fir
-    SubElement(fir_folder, 'visibility').text = '1'
-    
-    icao_folder = SubElement(fir_folder, 'Folder')
-    SubElement(icao_folder, 'name').text = icao
-    SubElement(icao_folder, 'visibility').text = '1'
-    
-    airport_folder = SubElement(icao_folder, 'Folder')
-    SubElement(airport_folder, 'name').text = airport_name
-    SubElement(airport_folder, 'visibility').text = '1'
-    
-    # Add area features (already sorted)
+        color = feature['color']
+        _emit_placemark(writer, depth, f"{color} {i})", color, 'LineString',
+                        _coord_string(feature, coord_cache))
+
+    _close_folders(writer, 2, 5)
+
+def stream_regions(writer, features, icao, airport_name, fir, coord_cache):
+    """Stream Regions section (Polygons)"""
+    # Hierarchy: FIR > ICAO > Airport
+    depth = _open_folders(writer, 2, ['Regions', fir, icao, airport_name],
+                          folder_id='Regions')
+
+    # Area features are already sorted
     for feature in features['areas']:
-        placemark = SubElement(airport_folder, 'Placemark')
-        SubElement(placemark, 'name').text = feature['name']
-        SubElement(placemark, 'description').text = feature['color']
-        SubElement(placemark, 'styleUrl').text = f"#{feature['color']}"
-        SubElement(placemark, 'visibility').text = '1'
-        
-        polygon = SubElement(placemark, 'Polygon')
-        SubElement(polygon, 'tessellate').text = '1'
-        SubElement(polygon, 'altitudeMode').text = 'clampToGround'
-        
-        outer = SubElement(polygon, 'outerBoundaryIs')
-        ring = SubElement(outer, 'LinearRing')
-        
-        coord_string = ' '.join([f"{lon},{lat},0" for lon, lat in feature['coords']])
-        SubElement(ring, 'coordinates').text = coord_string
-
-def create_labels_section(parent, features, icao, airport_name, fir):
-    """Create Labels section (Points) with proper hierarchy"""
-    labels_folder = SubElement(parent, 'Folder', id="Labels")
-    SubElement(labels_folder, 'name').text = 'Labels'
-    SubElement(labels_folder, 'visibility').text = '1'
-    
-    # Create hierarchy: FIR > ICAO > Airport
-    fir_folder = SubElement(labels_folder, 'Folder')
-    SubElement(fir_folder, 'name').text = fir
-    SubElement(fir_folder, 'visibility').text = '1'
-    
-    icao_folder = SubElement(fir_folder, 'Folder')
-    SubElement(icao_folder, 'name').text = icao
-    SubElement(icao_folder, 'visibility').text = '1'
-    
-    airport_folder = SubElement(icao_folder, 'Folder')
-    SubElement(airport_folder, 'name').text = airport_name
-    SubElement(airport_folder, 'visibility').text = '1'
-    
-    # Add point labels (already sorted)
-    for point in features['points']:
-        placemark = SubElement(airport_folder, 'Placemark')
-        SubElement(placemark, 'name').text = point['ref']
-        SubElement(placemark, 'description').text = 'Labels'
-        SubElement(placemark, 'styleUrl').text = '#Labels'
-        SubElement(placemark, 'visibility').text = '1'
-        
-        kml_point = SubElement(placemark, 'Point')
-        SubElement(kml_point, 'coordinates').text = f"{point['lon']},{point['lat']},0"
-
-def convert_osm_to_gng(osm_data, icao, airport_name, fir):
-    """Convert OSM data to GNG KML format"""
-    # Create KML root
-    kml = Element('kml', xmlns="http://www.opengis.net/kml/2.2")
-    doc = SubElement(kml, 'Document')
-    SubElement(doc, 'name').text = f"{icao} Ground Layout"
-    SubElement(doc, 'visibility').text = '1'
-    SubElement(doc, 'open').text = '1'
-    
-    # Add GNG styles
-    create_gng_styles(doc)
-    
-    # Parse OSM data
+        _emit_placemark(writer, depth, feature['name'], feature['color'], 'Polygon',
+                        _coord_string(feature, coord_cache))
+
+    _close_folders(writer, 2, 4)
+
+# Rendered per point label: every field except name and coordinates is
+# constant, so the whole section collapses into one join + write
+_POINT_TEMPLATE = """\
+{pad}<Placemark>
+{pad}  <name>{ref}</name>
+{pad}  <description>Labels</description>
+{pad}  <styleUrl>#Labels</styleUrl>
+{pad}  <visibility>1</visibility>
+{pad}  <Point>
+{pad}    <coordinates>{lon},{lat},0</coordinates>
+{pad}  </Point>
+{pad}</Placemark>"""
+
+def stream_labels(f, writer, features, icao, airport_name, fir):
+    """Stream Labels section (Points)"""
+    # Hierarchy: FIR > ICAO > Airport
+    depth = _open_folders(writer, 2, ['Labels', fir, icao, airport_name],
+                          folder_id='Labels')
+
+    # Point labels are already sorted; one write for the whole block instead
+    # of ten writer events per placemark
+    pad = '  ' * depth
+    f.write(''.join(
+        '\n' + _POINT_TEMPLATE.format(pad=pad, ref=escape(point['ref']),
+                                      lon=point['lon'], lat=point['lat'])
+        for point in features['points']))
+
+    _close_folders(writer, 2, 4)
+
+def write_gng_kml(osm_data, icao, airport_name, fir, output_file):
+    """Convert OSM data to GNG KML, streaming it straight to output_file"""
     features = parse_osm_data(osm_data)
-    
+
+    # Drop the decoded response before the write phase: the element dicts can
+    # run to hundreds of MB for big airports and everything needed is now in
+    # features, so don't hold both representations while serializing
+    osm_data.clear()
+    del osm_data
+
     print(f"\nFound features:")
     print(f"  Lines (SCT Entries): {len(features['lines'])}")
     print(f"  Areas (Regions): {len(features['areas'])}")
     print(f"  Points (Labels): {len(features['points'])}")
-    
-    # Create three main sections with proper hierarchies
-    create_sct_entries_section(doc, features, icao, airport_name, fir)
-    create_regions_section(doc, features, icao, airport_name, fir)
-    create_labels_section(doc, features, icao, airport_name, fir)
-    
-    return kml
 
-def prettify_xml(elem):
-    """Return pretty-printed XML string"""
-    rough_string = tostring(elem, encoding='unicode')
-    reparsed = minidom.parseString(rough_string)
-    return reparsed.toprettyxml(indent="  ")
+    with open(output_file, 'w', encoding='utf-8') as f:
+        # Fixed document header and style block, then the streamed sections
+        f.write("<?xml version='1.0' encoding='UTF-8'?>\n")
+        f.write('<kml xmlns="http://www.opengis.net/kml/2.2">\n')
+        f.write('  <Document>\n')
+        f.write(f'    <name>{escape(icao)} Ground Layout</name>\n')
+        f.write('    <visibility>1</visibility>\n')
+        f.write('    <open>1</open>')
+
+        write_gng_styles(f)
+
+        writer = XMLGenerator(f, 'utf-8', short_empty_elements=True)
+        coord_cache = {}
+        stream_sct_entries(writer, features, icao, airport_name, fir, coord_cache)
+        stream_regions(writer, features, icao, airport_name, fir, coord_cache)
+        stream_labels(f, writer, features, icao, airport_name, fir)
+
+        f.write('\n  </Document>\n</kml>\n')
+
+def run(icao, name, fir='CZQM', output=None):
+    """Convert one airport to GNG KML; returns the output file path
+
+    Callable in-process (e.g. from batch_process.py) so drivers don't pay
+    interpreter startup and re-imports for every airport.
+    """
+    icao = icao.upper()
+    output_file = output or f"{icao}_gng.kml"
+
+    # Query OSM
+    osm_data = query_overpass(icao)
+
+    # Convert to GNG, writing straight to disk (the callee empties osm_data
+    # once parsed, so this reference doesn't pin the response in memory)
+    print(f"Converting to GNG format...")
+    write_gng_kml(osm_data, icao, name, fir, output_file)
+
+    print(f"\n✓ Success! Created: {output_file}")
+    return output_file
 
 def main():
     parser = argparse.ArgumentParser(
@@ -411,25 +452,11 @@ def main():
     parser.add_argument('--name', required=True, help='Airport name (e.g., "Halifax")')
     parser.add_argument('--fir', default='CZQM', help='FIR code (default: CZQM)')
     parser.add_argument('--output', '-o', help='Output file (default: <ICAO>_gng.kml)')
-    
+
     args = parser.parse_args()
-    
-    icao = args.icao.upper()
-    output_file = args.output or f"{icao}_gng.kml"
-    
+
     try:
-        # Query OSM
-        osm_data = query_overpass(icao)
-        
-        # Convert to GNG
-        print(f"Converting to GNG format...")
-        kml = convert_osm_to_gng(osm_data, icao, args.name, args.fir)
-        
-        # Write output
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(prettify_xml(kml))
-        
-        print(f"\n✓ Success! Created: {output_file}")
+        run(args.icao, args.name, fir=args.fir, output=args.output)
         print(f"\nNext steps:")
         print(f"  1. Optional: Review in Google Earth")
         print(f"  2. Import to GNG")
@@ -7,232 +7,356 @@ Usage: python osm_to_kml.py CYHZ
 """
 
 import sys
+import gzip
+import io
+import hashlib
 import json
+import operator
+import time
 import requests
-from xml.etree.ElementTree import Element, SubElement, tostring
-from xml.dom import minidom
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from requests.adapters import HTTPAdapter, Retry
+from xml.sax.saxutils import XMLGenerator
 
-def query_overpass(icao_code):
+try:
+    import orjson
+except ImportError:
+    # Optional: stdlib json is used when the faster C decoder isn't installed
+    orjson = None
+
+# Re-runs within the TTL read the gzipped response from disk instead of
+# waiting in the Overpass queue again; --no-cache forces a fresh download
+CACHE_DIR = Path.home() / '.cache' / 'mapbuilder' / 'overpass'
+CACHE_TTL = 7 * 24 * 3600
+
+# Abort rather than buffer a runaway response (a mis-scoped query over a
+# dense city can return hundreds of MB)
+MAX_RESPONSE_BYTES = 256 << 20
+
+# Keep-alive session shared across queries: looping over several ICAO codes
+# reuses the TCP+TLS connection, and transient Overpass errors (it rate-limits
+# with 429 under load) retry with backoff instead of failing the run
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=4, pool_maxsize=4,
+    max_retries=Retry(total=3, backoff_factor=1, status_forcelist=[429, 502, 503, 504])))
+
+# Feature selectors shared by the area and radius query shapes; the spatial
+# filter ((area.a) or (around.airport:2000)) is appended per selector
+_FEATURE_SELECTORS = [
+    # Aeroway features
+    'way["aeroway"="runway"]',
+    'way["aeroway"="taxiway"]',
+    'way["aeroway"="apron"]',
+    'node["aeroway"="parking_position"]',
+    'node["aeroway"="gate"]',
+    'node["aeroway"="holding_position"]',
+    'way["aeroway"="taxilane"]',
+    # Buildings
+    'way["building"="terminal"]',
+    'way["building"="hangar"]',
+    'way["building"="tower"]',
+    'way["aeroway"="terminal"]',
+    'way["aeroway"="hangar"]',
+    'way["aeroway"="tower"]',
+    'way["building"]["aeroway"]',
+    # Landuse & vegetation
+    'way["landuse"="grass"]',
+    'way["landuse"="meadow"]',
+    'way["natural"="wood"]',
+    'way["natural"="tree_row"]',
+    'way["natural"="grassland"]',
+    'way["landuse"="forest"]',
+    # Roads & paths
+    'way["highway"="service"]["service"="runway"]',
+    'way["highway"="service"]["aeroway"]',
+    # Water features
+    'way["natural"="water"]',
+    'way["waterway"]',
+]
+
+def _build_query(icao_code, use_area):
+    """
+    Render the comprehensive query, constrained either to the aerodrome
+    boundary area or to a 2 km radius around the airport elements
+    """
+    if use_area:
+        head = (f'(\n'
+                f'  relation["aeroway"="aerodrome"]["icao"="{icao_code}"];\n'
+                f'  way["aeroway"="aerodrome"]["icao"="{icao_code}"];\n'
+                f')->.airport;\n'
+                f'.airport map_to_area->.a;')
+        spatial = '(area.a)'
+    else:
+        head = (f'(\n'
+                f'  relation["aeroway"="aerodrome"]["icao"="{icao_code}"];\n'
+                f'  way["aeroway"="aerodrome"]["icao"="{icao_code}"];\n'
+                f'  node["aeroway"="aerodrome"]["icao"="{icao_code}"];\n'
+                f')->.airport;')
+        spatial = '(around.airport:2000)'
+    selectors = '\n'.join(f'  {s}{spatial};' for s in _FEATURE_SELECTORS)
+    return f'[out:json][timeout:45];\n{head}\n(\n{selectors}\n);\nout geom;\n'
+
+def query_overpass(icao_code, refresh=False):
     """
     Query Overpass API for comprehensive airport data
+
+    The area query clips results to the mapped aerodrome boundary, which
+    keeps off-airport clutter (city streets, distant forest and water) out
+    of the response entirely; airports without a closed boundary fall back
+    to the old 2 km radius query
     """
-    overpass_url = "https://overpass-api.de/api/interpreter"
-    
-    # Comprehensive Overpass QL query for all airport features
-    query = f"""
-    [out:json][timeout:45];
-    (
-      // Find airport by ICAO code
-      relation["aeroway"="aerodrome"]["icao"="{icao_code}"];
-      way["aeroway"="aerodrome"]["icao"="{icao_code}"];
-      node["aeroway"="aerodrome"]["icao"="{icao_code}"];
-    )->.airport;
-    
-    // Get all features within or near the airport
-    (
-      // AEROWAY FEATURES
-      way["aeroway"="runway"](around.airport:2000);
-      way["aeroway"="taxiway"](around.airport:2000);
-      way["aeroway"="apron"](around.airport:2000);
-      node["aeroway"="parking_position"](around.airport:2000);
-      node["aeroway"="gate"](around.airport:2000);
-      node["aeroway"="holding_position"](around.airport:2000);
-      way["aeroway"="taxilane"](around.airport:2000);
-      
-      // BUILDINGS
-      way["building"="terminal"](around.airport:2000);
-      way["building"="hangar"](around.airport:2000);
-      way["building"="tower"](around.airport:2000);
-      way["aeroway"="terminal"](around.airport:2000);
-      way["aeroway"="hangar"](around.airport:2000);
-      way["aeroway"="tower"](around.airport:2000);
-      way["building"]["aeroway"](around.airport:2000);
-      
-      // LANDUSE & VEGETATION
-      way["landuse"="grass"](around.airport:2000);
-      way["landuse"="meadow"](around.airport:2000);
-      way["natural"="wood"](around.airport:2000);
-      way["natural"="tree_row"](around.airport:2000);
-      way["natural"="grassland"](around.airport:2000);
-      way["landuse"="forest"](around.airport:2000);
-      
-      // ROADS & PATHS
-      way["highway"="service"]["service"="runway"](around.airport:2000);
-      way["highway"="service"]["aeroway"](around.airport:2000);
-      
-      // WATER FEATURES
-      way["natural"="water"](around.airport:2000);
-      way["waterway"](around.airport:2000);
-    );
-    
-    out geom;
+    data = _fetch(icao_code, _build_query(icao_code, use_area=True), refresh)
+    if not data.get('elements'):
+        print(f"No mapped aerodrome area for {icao_code}, "
+              "falling back to 2 km radius query...")
+        data = _fetch(icao_code, _build_query(icao_code, use_area=False), refresh)
+    return data
+
+def _fetch(icao_code, query, refresh):
     """
-    
+    Run one Overpass query through the disk cache
+    """
+    overpass_url = "https://overpass-api.de/api/interpreter"
+
+    key = hashlib.sha1((icao_code + query).encode()).hexdigest()
+    cache_file = CACHE_DIR / f"{key}.json.gz"
+    if not refresh and cache_file.exists() and time.time() - cache_file.stat().st_mtime < CACHE_TTL:
+        print(f"Using cached Overpass response for {icao_code}...")
+        with gzip.open(cache_file, 'rb') as f:
+            raw = f.read()
+        return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
     print(f"Querying Overpass API for {icao_code} (comprehensive query)...")
-    response = requests.post(overpass_url, data={'data': query}, timeout=60)
+
+    # Receive in 1 MB chunks: split connect/read timeouts, progress on
+    # stderr during long queue waits, and a hard cap instead of buffering
+    # a pathological response whole
+    chunks = []
+    received = 0
+    with SESSION.post(overpass_url, data={'data': query},
+                      timeout=(10, 120), stream=True) as response:
+        if response.status_code != 200:
+            raise Exception(f"Overpass API error: {response.status_code}")
+        for chunk in response.iter_content(chunk_size=1 << 20):
+            received += len(chunk)
+            if received > MAX_RESPONSE_BYTES:
+                raise Exception(
+                    f"Overpass response exceeded {MAX_RESPONSE_BYTES >> 20} MB "
+                    "- narrow the query")
+            chunks.append(chunk)
+            print(f"  received {received >> 20} MB...", end='\r', file=sys.stderr)
+    body = b''.join(chunks)
+
+    # Write-then-rename so an interrupted run can't leave a truncated cache
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_suffix('.tmp')
+    with gzip.open(tmp_file, 'wb') as f:
+        f.write(body)
+    tmp_file.replace(cache_file)
+
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+# Placemarks are emitted through an XMLGenerator writing straight to the
+# output file: a busy aerodrome produces thousands of features, and streaming
+# them avoids holding the whole document tree (and a pretty-printed copy of
+# it) in memory before anything hits disk.
+
+def _start(writer, depth, tag, attrs=None):
+    writer.characters('\n' + '  ' * depth)
+    writer.startElement(tag, attrs or {})
+
+def _end(writer, depth, tag):
+    writer.characters('\n' + '  ' * depth)
+    writer.endElement(tag)
+
+def _leaf(writer, depth, tag, text):
+    writer.characters('\n' + '  ' * depth)
+    writer.startElement(tag, {})
+    writer.characters(text)
+    writer.endElement(tag)
+
+# Styles for all feature types
+_STYLES = {
+    # Aeroway features
+    'runway': {'color': 'ff0000ff', 'width': '4'},           # Red
+    'taxiway': {'color': 'ff00ffff', 'width': '2'},          # Yellow
+    'taxilane': {'color': 'ff00aaff', 'width': '1.5'},       # Orange
+    'apron': {'color': 'ff808080', 'width': '1'},            # Gray
+    'parking': {'color': 'ff00ff00', 'scale': '0.5'},        # Green
+    'gate': {'color': 'ff0000ff', 'scale': '0.5'},           # Blue
+    'holding': {'color': 'ffff00ff', 'scale': '0.4'},        # Magenta
+    
+    # Buildings
+    'terminal': {'color': 'ff4040ff', 'width': '2'},         # Light Red
+    'hangar': {'color': 'ff404040', 'width': '2'},           # Dark Gray
+    'tower': {'color': 'ffff4040', 'width': '2'},            # Light Blue
+    'building': {'color': 'ff606060', 'width': '1.5'},       # Medium Gray
+    
+    # Vegetation
+    'grass': {'color': 'ff00ff00', 'width': '1'},            # Green
+    'meadow': {'color': 'ff00cc00', 'width': '1'},           # Dark Green
+    'wood': {'color': 'ff008800', 'width': '1'},             # Forest Green
+    'forest': {'color': 'ff006600', 'width': '1'},           # Deep Green
+    'tree_row': {'color': 'ff00aa00', 'width': '1'},         # Med Green
     
-    if response.status_code != 200:
-        raise Exception(f"Overpass API error: {response.status_code}")
+    # Roads
+    'service_road': {'color': 'ffaaaaaa', 'width': '1'},     # Light Gray
     
-    return response.json()
+    # Water
+    'water': {'color': 'ffff0000', 'width': '1'},            # Blue
+}
 
-def create_kml_document(icao_code):
+def _render_styles():
     """
-    Create base KML document structure with comprehensive styles
+    Serialize the style table once at import; every document then gets the
+    same pre-rendered block instead of re-walking the table per airport
     """
-    kml = Element('kml', xmlns="http://www.opengis.net/kml/2.2")
-    document = SubElement(kml, 'Document')
-    
-    # Use a different variable name to avoid conflict
-    doc_name = SubElement(document, 'name')
-    doc_name.text = f"{icao_code} Airport - Complete"
-    
-    # Define styles for all feature types
-    styles = {
-        # Aeroway features
-        'runway': {'color': 'ff0000ff', 'width': '4'},           # Red
-        'taxiway': {'color': 'ff00ffff', 'width': '2'},          # Yellow
-        'taxilane': {'color': 'ff00aaff', 'width': '1.5'},       # Orange
-        'apron': {'color': 'ff808080', 'width': '1'},            # Gray
-        'parking': {'color': 'ff00ff00', 'scale': '0.5'},        # Green
-        'gate': {'color': 'ff0000ff', 'scale': '0.5'},           # Blue
-        'holding': {'color': 'ffff00ff', 'scale': '0.4'},        # Magenta
-        
-        # Buildings
-        'terminal': {'color': 'ff4040ff', 'width': '2'},         # Light Red
-        'hangar': {'color': 'ff404040', 'width': '2'},           # Dark Gray
-        'tower': {'color': 'ffff4040', 'width': '2'},            # Light Blue
-        'building': {'color': 'ff606060', 'width': '1.5'},       # Medium Gray
-        
-        # Vegetation
-        'grass': {'color': 'ff00ff00', 'width': '1'},            # Green
-        'meadow': {'color': 'ff00cc00', 'width': '1'},           # Dark Green
-        'wood': {'color': 'ff008800', 'width': '1'},             # Forest Green
-        'forest': {'color': 'ff006600', 'width': '1'},           # Deep Green
-        'tree_row': {'color': 'ff00aa00', 'width': '1'},         # Med Green
-        
-        # Roads
-        'service_road': {'color': 'ffaaaaaa', 'width': '1'},     # Light Gray
-        
-        # Water
-        'water': {'color': 'ffff0000', 'width': '1'},            # Blue
-    }
-    
-    for style_id, style_attrs in styles.items():
-        style = SubElement(document, 'Style', id=style_id)
+    buf = io.StringIO()
+    writer = XMLGenerator(buf, 'utf-8', short_empty_elements=True)
+    for style_id, style_attrs in _STYLES.items():
+        _start(writer, 2, 'Style', {'id': style_id})
         if 'color' in style_attrs and 'width' in style_attrs:
             # Line/Polygon style
-            linestyle = SubElement(style, 'LineStyle')
-            line_color = SubElement(linestyle, 'color')
-            line_color.text = style_attrs['color']
-            line_width = SubElement(linestyle, 'width')
-            line_width.text = style_attrs['width']
+            _start(writer, 3, 'LineStyle')
+            _leaf(writer, 4, 'color', style_attrs['color'])
+            _leaf(writer, 4, 'width', style_attrs['width'])
+            _end(writer, 3, 'LineStyle')
             # Add fill for polygons
-            polystyle = SubElement(style, 'PolyStyle')
-            poly_color = SubElement(polystyle, 'color')
-            poly_color.text = style_attrs['color'].replace('ff', '4d')  # Semi-transparent
+            _start(writer, 3, 'PolyStyle')
+            _leaf(writer, 4, 'color', style_attrs['color'].replace('ff', '4d'))  # Semi-transparent
+            _end(writer, 3, 'PolyStyle')
         if 'scale' in style_attrs:
             # Point style
-            iconstyle = SubElement(style, 'IconStyle')
-            icon_scale = SubElement(iconstyle, 'scale')
-            icon_scale.text = style_attrs['scale']
-            icon_color = SubElement(iconstyle, 'color')
-            icon_color.text = style_attrs['color']
-    
-    return kml, document
+            _start(writer, 3, 'IconStyle')
+            _leaf(writer, 4, 'scale', style_attrs['scale'])
+            _leaf(writer, 4, 'color', style_attrs['color'])
+            _end(writer, 3, 'IconStyle')
+        _end(writer, 2, 'Style')
+    return buf.getvalue()
 
-def add_way_to_kml(document, element, style_id, counter):
+_STYLE_BLOCK = _render_styles()
+
+def write_kml_header(f, writer, icao_code):
     """
-    Add an OSM way (line or polygon) to KML
+    Write the document opening and the comprehensive style definitions
+    """
+    f.write("<?xml version='1.0' encoding='utf-8'?>\n")
+    f.write('<kml xmlns="http://www.opengis.net/kml/2.2">\n')
+    f.write('  <Document>')
+
+    _leaf(writer, 2, 'name', f"{icao_code} Airport - Complete")
+
+    f.write(_STYLE_BLOCK)
+
+# Tags shown elsewhere in the placemark, excluded from its description
+_SKIP_DESC = frozenset(('name', 'ref', 'icao'))
+
+def _placemark_header(writer, tags, style_id, counter):
+    """
+    Emit the Placemark opening shared by ways and nodes: name (generated if
+    the element has none), tag description and style reference
     """
-    placemark = SubElement(document, 'Placemark')
-    
-    # Add name - always include one
-    tags = element.get('tags', {})
     name_text = tags.get('name') or tags.get('ref', '')
     if not name_text:
         counter['count'] += 1
         name_text = f"{style_id.upper()}_{counter['count']}"
-    
-    pm_name = SubElement(placemark, 'name')
-    pm_name.text = name_text
-    
+
+    _start(writer, 3, 'Placemark')
+    _leaf(writer, 4, 'name', name_text)
+
     # Add description with tags
-    desc_parts = []
-    for key, value in tags.items():
-        if key not in ['name', 'ref', 'icao']:
-            desc_parts.append(f"{key}: {value}")
-    
-    if desc_parts:
-        pm_desc = SubElement(placemark, 'description')
-        pm_desc.text = '\n'.join(desc_parts)
-    
-    # Add style
-    pm_styleurl = SubElement(placemark, 'styleUrl')
-    pm_styleurl.text = f"#{style_id}"
-    
-    # Add geometry
+    desc_text = '\n'.join(
+        f"{key}: {value}" for key, value in tags.items() if key not in _SKIP_DESC)
+    if desc_text:
+        _leaf(writer, 4, 'description', desc_text)
+
+    _leaf(writer, 4, 'styleUrl', f"#{style_id}")
+
+# Buildings, aprons, vegetation, water = polygons; others = lines
+_POLYGON_TYPES = frozenset({'apron', 'terminal', 'hangar', 'tower', 'building',
+                            'grass', 'meadow', 'wood', 'forest', 'tree_row', 'water'})
+
+# Built once; itemgetter construction isn't free and this runs per way
+_LON_LAT = operator.itemgetter('lon', 'lat')
+
+def add_way_to_kml(writer, element, style_id, counter):
+    """
+    Add an OSM way (line or polygon) to KML
+    """
     geometry = element.get('geometry', [])
     if not geometry:
         return
-    
+
+    _placemark_header(writer, element.get('tags', {}), style_id, counter)
+
     # Determine if it's a closed polygon or line
-    is_closed = (geometry[0]['lat'] == geometry[-1]['lat'] and 
+    is_closed = (geometry[0]['lat'] == geometry[-1]['lat'] and
                  geometry[0]['lon'] == geometry[-1]['lon'])
-    
-    # Buildings, aprons, vegetation, water = polygons; others = lines
-    polygon_types = ['apron', 'terminal', 'hangar', 'tower', 'building', 
-                     'grass', 'meadow', 'wood', 'forest', 'tree_row', 'water']
-    
-    if is_closed and style_id in polygon_types:
-        polygon = SubElement(placemark, 'Polygon')
-        outer = SubElement(polygon, 'outerBoundaryIs')
-        linearring = SubElement(outer, 'LinearRing')
-        ring_coords = SubElement(linearring, 'coordinates')
+
+    # Coordinates in KML format: lon,lat,alt — join over a generator (no
+    # intermediate list), with itemgetter grabbing both keys in one call
+    coord_text = ' '.join(
+        f"{lon},{lat},0" for lon, lat in map(_LON_LAT, geometry))
+
+    if is_closed and style_id in _POLYGON_TYPES:
+        _start(writer, 4, 'Polygon')
+        _start(writer, 5, 'outerBoundaryIs')
+        _start(writer, 6, 'LinearRing')
+        _leaf(writer, 7, 'coordinates', coord_text)
+        _end(writer, 6, 'LinearRing')
+        _end(writer, 5, 'outerBoundaryIs')
+        _end(writer, 4, 'Polygon')
     else:
-        linestring = SubElement(placemark, 'LineString')
-        ring_coords = SubElement(linestring, 'coordinates')
-    
-    # Add coordinates (KML format: lon,lat,alt)
-    coord_text = []
-    for node in geometry:
-        coord_text.append(f"{node['lon']},{node['lat']},0")
-    ring_coords.text = ' '.join(coord_text)
+        _start(writer, 4, 'LineString')
+        _leaf(writer, 5, 'coordinates', coord_text)
+        _end(writer, 4, 'LineString')
+
+    _end(writer, 3, 'Placemark')
 
-def add_node_to_kml(document, element, style_id, counter):
+def add_node_to_kml(writer, element, style_id, counter):
     """
     Add an OSM node (point) to KML
     """
-    placemark = SubElement(document, 'Placemark')
-    
-    # Add name - always include one
-    tags = element.get('tags', {})
-    name_text = tags.get('name') or tags.get('ref', '')
-    if not name_text:
-        counter['count'] += 1
-        name_text = f"{style_id.upper()}_{counter['count']}"
-    
-    pm_name = SubElement(placemark, 'name')
-    pm_name.text = name_text
-    
-    # Add description with tags
-    desc_parts = []
-    for key, value in tags.items():
-        if key not in ['name', 'ref', 'icao']:
-            desc_parts.append(f"{key}: {value}")
-    
-    if desc_parts:
-        pm_desc = SubElement(placemark, 'description')
-        pm_desc.text = '\n'.join(desc_parts)
-    
-    # Add style
-    pm_styleurl = SubElement(placemark, 'styleUrl')
-    pm_styleurl.text = f"#{style_id}"
-    
-    # Add point geometry
-    point = SubElement(placemark, 'Point')
-    point_coords = SubElement(point, 'coordinates')
-    point_coords.text = f"{element['lon']},{element['lat']},0"
+    _placemark_header(writer, element.get('tags', {}), style_id, counter)
+
+    _start(writer, 4, 'Point')
+    _leaf(writer, 5, 'coordinates', f"{element['lon']},{element['lat']},0")
+    _end(writer, 4, 'Point')
+
+    _end(writer, 3, 'Placemark')
+
+# One dict probe per tag key replaces the old if/elif ladder of ~15 string
+# compares per element; probe order preserves the ladder's precedence
+_CATEGORY_MAP = {
+    ('aeroway', 'runway'):           ('Runways', 'runway'),
+    ('aeroway', 'taxiway'):          ('Taxiways', 'taxiway'),
+    ('aeroway', 'taxilane'):         ('Taxiways', 'taxilane'),
+    ('aeroway', 'apron'):            ('Aprons', 'apron'),
+    ('aeroway', 'parking_position'): ('Parking & Gates', 'parking'),
+    ('aeroway', 'gate'):             ('Parking & Gates', 'gate'),
+    ('aeroway', 'holding_position'): ('Parking & Gates', 'holding'),
+    ('aeroway', 'terminal'):         ('Buildings', 'terminal'),
+    ('aeroway', 'hangar'):           ('Buildings', 'hangar'),
+    ('aeroway', 'tower'):            ('Buildings', 'tower'),
+    ('building', 'terminal'):        ('Buildings', 'terminal'),
+    ('building', 'hangar'):          ('Buildings', 'hangar'),
+    ('building', 'tower'):           ('Buildings', 'tower'),
+}
+
+# Vegetation and water values, ranked in the ladder's branch order so an
+# element carrying both landuse and natural still resolves the same way
+# (e.g. landuse=meadow + natural=grassland is grass, not meadow)
+_VEG_RANK = {
+    ('landuse', 'grass'):     (0, ('Vegetation', 'grass')),
+    ('natural', 'grassland'): (0, ('Vegetation', 'grass')),
+    ('landuse', 'meadow'):    (1, ('Vegetation', 'meadow')),
+    ('natural', 'wood'):      (2, ('Vegetation', 'wood')),
+    ('landuse', 'forest'):    (2, ('Vegetation', 'wood')),
+    ('natural', 'tree_row'):  (3, ('Vegetation', 'tree_row')),
+    ('natural', 'water'):     (4, ('Water', 'water')),
+}
 
 def categorize_element(element):
     """
@@ -240,161 +364,178 @@ def categorize_element(element):
     Returns (folder_name, style_id) tuple or None if element should be skipped
     """
     tags = element.get('tags', {})
-    
-    # Aeroway features
-    aeroway = tags.get('aeroway')
-    if aeroway == 'runway':
-        return ('Runways', 'runway')
-    elif aeroway == 'taxiway':
-        return ('Taxiways', 'taxiway')
-    elif aeroway == 'taxilane':
-        return ('Taxiways', 'taxilane')
-    elif aeroway == 'apron':
-        return ('Aprons', 'apron')
-    elif aeroway == 'parking_position':
-        return ('Parking & Gates', 'parking')
-    elif aeroway == 'gate':
-        return ('Parking & Gates', 'gate')
-    elif aeroway == 'holding_position':
-        return ('Parking & Gates', 'holding')
-    elif aeroway == 'terminal':
-        return ('Buildings', 'terminal')
-    elif aeroway == 'hangar':
-        return ('Buildings', 'hangar')
-    elif aeroway == 'tower':
-        return ('Buildings', 'tower')
-    
-    # Building features
-    building = tags.get('building')
-    if building == 'terminal':
-        return ('Buildings', 'terminal')
-    elif building == 'hangar':
-        return ('Buildings', 'hangar')
-    elif building == 'tower':
-        return ('Buildings', 'tower')
-    elif building and aeroway:  # Airport building
-        return ('Buildings', 'building')
-    
-    # Vegetation & Landuse
-    landuse = tags.get('landuse')
-    natural = tags.get('natural')
-    if landuse == 'grass' or natural == 'grassland':
-        return ('Vegetation', 'grass')
-    elif landuse == 'meadow':
-        return ('Vegetation', 'meadow')
-    elif natural == 'wood' or landuse == 'forest':
-        return ('Vegetation', 'wood')
-    elif natural == 'tree_row':
-        return ('Vegetation', 'tree_row')
-    
+    get = tags.get
+
+    # Aeroway and building features
+    for key in ('aeroway', 'building'):
+        value = get(key)
+        if value is not None:
+            category = _CATEGORY_MAP.get((key, value))
+            if category is not None:
+                return category
+            # Untyped building on airport grounds
+            if key == 'building' and get('aeroway'):
+                return ('Buildings', 'building')
+
+    # Vegetation & water: keep the best-ranked match across both keys
+    best = None
+    for key in ('landuse', 'natural'):
+        value = get(key)
+        if value is not None:
+            ranked = _VEG_RANK.get((key, value))
+            if ranked is not None and (best is None or ranked < best):
+                best = ranked
+    if best is not None:
+        return best[1]
+
     # Water
-    if natural == 'water' or tags.get('waterway'):
+    if get('waterway'):
         return ('Water', 'water')
-    
+
     # Roads
-    if tags.get('highway') == 'service':
+    if get('highway') == 'service':
         return ('Service Roads', 'service_road')
-    
+
     return None
 
-def convert_osm_to_kml(osm_data, icao_code):
+def convert_osm_to_kml(osm_data, icao_code, f):
     """
-    Convert OSM data to KML with comprehensive airport features
+    Convert OSM data to KML with comprehensive airport features, streaming
+    the document straight to the open output file
     """
-    kml, document = create_kml_document(icao_code)
-    
-    # Create folders for organization
-    folders = {}
-    folder_names = ['Runways', 'Taxiways', 'Aprons', 'Parking & Gates', 
+    writer = XMLGenerator(f, 'utf-8', short_empty_elements=True)
+
+    write_kml_header(f, writer, icao_code)
+
+    # KML wants each folder contiguous, so bucket the elements per folder
+    # first; the placemarks themselves then stream out one at a time
+    folder_names = ['Runways', 'Taxiways', 'Aprons', 'Parking & Gates',
                     'Buildings', 'Vegetation', 'Water', 'Service Roads']
-    
-    for folder_name in folder_names:
-        folder = SubElement(document, 'Folder')
-        folder_name_elem = SubElement(folder, 'name')
-        folder_name_elem.text = folder_name
-        folders[folder_name] = folder
-    
-    # Counters for unnamed features (one per style type)
-    counters = {}
-    
-    # Process elements
+    buckets = {folder_name: [] for folder_name in folder_names}
+
+    # Counters for unnamed features, preseeded with every style the
+    # categorizer can return so the emission loop needs no membership check
+    style_ids = {style_id for _, style_id in _CATEGORY_MAP.values()}
+    style_ids.update(style_id for _, (_, style_id) in _VEG_RANK.values())
+    style_ids.update(('building', 'water', 'service_road'))
+    counters = {style_id: {'count': 0} for style_id in style_ids}
+
+    # Local bindings save a global (or attribute) lookup per element in
+    # the categorization loop
+    categorize = categorize_element
+    add_way = add_way_to_kml
+    add_node = add_node_to_kml
+
     for element in osm_data.get('elements', []):
-        category = categorize_element(element)
+        category = categorize(element)
         if not category:
             continue
-        
         folder_name, style_id = category
-        folder = folders[folder_name]
-        
-        # Initialize counter if needed
-        if style_id not in counters:
-            counters[style_id] = {'count': 0}
-        
-        # Add to KML
-        if element['type'] == 'way':
-            add_way_to_kml(folder, element, style_id, counters[style_id])
-        elif element['type'] == 'node':
-            add_node_to_kml(folder, element, style_id, counters[style_id])
-    
-    return kml
+        # Resolve the way/node dispatch once, here, instead of re-testing
+        # element['type'] for every placemark in the emission loop
+        etype = element['type']
+        if etype == 'way':
+            add = add_way
+        elif etype == 'node':
+            add = add_node
+        else:
+            continue
+        buckets[folder_name].append((add, element, style_id))
+
+    # The buckets now hold every element we will emit; drop the decoded
+    # response so the element list isn't pinned through the emission phase
+    osm_data.clear()
+
+    for folder_name in folder_names:
+        _start(writer, 2, 'Folder')
+        _leaf(writer, 3, 'name', folder_name)
+
+        # pop() releases each folder's elements once they've been written
+        for add, element, style_id in buckets.pop(folder_name):
+            add(writer, element, style_id, counters[style_id])
+
+        _end(writer, 2, 'Folder')
+
+    f.write('\n  </Document>\n</kml>\n')
 
-def prettify_xml(elem):
+def process_airport(icao_code, refresh=False):
     """
-    Return a pretty-printed XML string - uses manual indentation to avoid tag name corruption
+    Query OSM and write {ICAO}_ground.kml for a single airport
+
+    Returns the output filename, or None when OSM has no data for the code
     """
-    from xml.etree import ElementTree as ET
-    # Write to string without prettification first
-    rough = ET.tostring(elem, encoding='unicode')
-    # Use minidom ONLY for indentation, then fix the corrupted tags
-    from xml.dom import minidom
-    parsed = minidom.parseString(rough)
-    pretty = parsed.toprettyxml(indent="  ")
-    # Fix the corrupted <n> and </n> tags back to <name> and </name>
-    pretty = pretty.replace('<n>', '<name>').replace('</n>', '</name>')
-    return pretty
+    output_file = f"{icao_code}_ground.kml"
+
+    osm_data = query_overpass(icao_code, refresh=refresh)
+
+    if not osm_data.get('elements'):
+        print(f"No airport data found for {icao_code}")
+        print("This could mean:")
+        print("  - The airport is not in OpenStreetMap")
+        print("  - The ICAO code is incorrect")
+        print("  - The airport lacks detailed data in OSM")
+        return None
+
+    print(f"Found {len(osm_data['elements'])} features for {icao_code}")
+
+    # Convert to KML, streaming straight to the output file
+    with open(output_file, 'w', encoding='utf-8') as f:
+        convert_osm_to_kml(osm_data, icao_code, f)
+
+    print(f"Successfully created {output_file}")
+    return output_file
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python osm_to_kml.py ICAO_CODE")
+    args = sys.argv[1:]
+    refresh = '--no-cache' in args
+    if refresh:
+        args.remove('--no-cache')
+
+    if not args:
+        print("Usage: python osm_to_kml.py ICAO_CODE [ICAO_CODE ...] [--no-cache]")
         print("Example: python osm_to_kml.py CYHZ")
         sys.exit(1)
-    
-    icao_code = sys.argv[1].upper()
-    output_file = f"{icao_code}_ground.kml"
-    
+
+    icao_codes = [arg.upper() for arg in args]
+
     try:
-        # Query OSM
-        osm_data = query_overpass(icao_code)
-        
-        if not osm_data.get('elements'):
-            print(f"No airport data found for {icao_code}")
-            print("This could mean:")
-            print("  - The airport is not in OpenStreetMap")
-            print("  - The ICAO code is incorrect")
-            print("  - The airport lacks detailed data in OSM")
-            sys.exit(1)
-        
-        print(f"Found {len(osm_data['elements'])} features")
-        
-        # Convert to KML
-        kml = convert_osm_to_kml(osm_data, icao_code)
-        
-        # Write to file
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(prettify_xml(kml))
-        
-        print(f"Successfully created {output_file}")
-        print(f"\nFeatures included:")
-        print(f"  - Runways, taxiways, aprons")
-        print(f"  - Parking positions, gates, holding positions")
-        print(f"  - Buildings (terminals, hangars, towers)")
-        print(f"  - Vegetation (grass, woods, meadows)")
-        print(f"  - Water features")
-        print(f"  - Service roads")
-        print(f"\nYou can now:")
-        print(f"  1. Open {output_file} in Google Earth to verify")
-        print(f"  2. Use it as input to your mapbuilder tool")
-        
+        if len(icao_codes) == 1:
+            output_file = process_airport(icao_codes[0], refresh=refresh)
+            if output_file is None:
+                sys.exit(1)
+
+            print(f"\nFeatures included:")
+            print(f"  - Runways, taxiways, aprons")
+            print(f"  - Parking positions, gates, holding positions")
+            print(f"  - Buildings (terminals, hangars, towers)")
+            print(f"  - Vegetation (grass, woods, meadows)")
+            print(f"  - Water features")
+            print(f"  - Service roads")
+            print(f"\nYou can now:")
+            print(f"  1. Open {output_file} in Google Earth to verify")
+            print(f"  2. Use it as input to your mapbuilder tool")
+        else:
+            # Overpass grants two concurrent slots per client, so two workers
+            # overlap the HTTP waits without tripping 429s (the same limit
+            # batch_process.py respects); all workers share SESSION's pool
+            failed = []
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = {executor.submit(process_airport, icao, refresh): icao
+                           for icao in icao_codes}
+                for future in as_completed(futures):
+                    icao = futures[future]
+                    try:
+                        if future.result() is None:
+                            failed.append(icao)
+                    except Exception as e:
+                        print(f"ERROR processing {icao}: {e}", file=sys.stderr)
+                        failed.append(icao)
+
+            print(f"\nSuccessful: {len(icao_codes) - len(failed)}/{len(icao_codes)}")
+            if failed:
+                print(f"Failed: {', '.join(sorted(failed))}")
+                sys.exit(1)
+
     except requests.exceptions.RequestException as e:
         print(f"Error querying Overpass API: {e}")
         sys.exit(1)
@@ -3,50 +3,58 @@
 Query OSM for features INSIDE the CYHZ aerodrome boundary only
 """
 
-import requests
+import gzip
+import hashlib
 import json
+import sys
+import time
+import requests
+from pathlib import Path
+from requests.adapters import HTTPAdapter, Retry
 
-overpass_url = "https://overpass-api.de/api/interpreter"
-
-# First, let's see what the aerodrome boundary looks like
-query_aerodrome = """
-[out:json][timeout:30];
-(
-  relation["aeroway"="aerodrome"]["icao"="CYHZ"];
-  way["aeroway"="aerodrome"]["icao"="CYHZ"];
-);
-out geom;
-"""
+try:
+    import orjson
+except ImportError:
+    # Optional: stdlib json is used when the faster C codec isn't installed
+    orjson = None
 
-print("Step 1: Querying for CYHZ aerodrome boundary...")
-response = requests.post(overpass_url, data={'data': query_aerodrome}, timeout=60)
-response.raise_for_status()
-aerodrome_data = response.json()
+overpass_url = "https://overpass-api.de/api/interpreter"
 
-print(f"\nAerodrome elements found: {len(aerodrome_data['elements'])}")
-for elem in aerodrome_data['elements']:
-    print(f"  - Type: {elem['type']}, ID: {elem['id']}")
-    if 'tags' in elem:
-        print(f"    Tags: {elem['tags']}")
+def save_json(path, data):
+    """Write indented JSON, with the C encoder when available"""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
 
-# Save aerodrome boundary
-with open('cyhz_aerodrome_boundary.json', 'w') as f:
-    json.dump(aerodrome_data, f, indent=2)
+# Re-runs within the TTL read the gzipped response from disk instead of
+# waiting in the Overpass queue again; --no-cache forces a fresh download
+CACHE_DIR = Path.home() / '.cache' / 'mapbuilder' / 'overpass'
+CACHE_TTL = 7 * 24 * 3600
 
-print("\nAerodrome boundary saved to: cyhz_aerodrome_boundary.json")
+# Keep-alive session with retry/backoff for transient Overpass errors
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=4, pool_maxsize=4,
+    max_retries=Retry(total=3, backoff_factor=1, status_forcelist=[429, 502, 503, 504])))
 
-# Now query features using the aerodrome as area
-# Try different syntax approaches
-query_inside = """
+# One combined program: Overpass schedules every request through its global
+# queue, so emitting the boundary geometry and the inside features from a
+# single POST pays the queue wait once instead of twice
+query = """
 [out:json][timeout:90];
 // Get the aerodrome
 (
   relation["aeroway"="aerodrome"]["icao"="CYHZ"];
   way["aeroway"="aerodrome"]["icao"="CYHZ"];
-);
-map_to_area->.a;
+)->.ad;
+
+// Emit the boundary itself, then everything inside it
+.ad out geom;
+.ad map_to_area->.a;
 
-// Get features inside
 (
   way["aeroway"](area.a);
   node["aeroway"](area.a);
@@ -62,44 +70,81 @@ out body;
 out skel qt;
 """
 
-print("\n" + "="*70)
-print("Step 2: Querying for features INSIDE aerodrome boundary...")
-print("="*70)
+print("Querying for CYHZ aerodrome boundary and features inside it...")
 
 try:
-    response = requests.post(overpass_url, data={'data': query_inside}, timeout=120)
-    response.raise_for_status()
-    inside_data = response.json()
-    
-    print(f"\nElements inside aerodrome: {len(inside_data['elements'])}")
-    
+    cache_file = CACHE_DIR / f"{hashlib.sha1(('CYHZ' + query).encode()).hexdigest()}.json.gz"
+    if ('--no-cache' not in sys.argv and cache_file.exists()
+            and time.time() - cache_file.stat().st_mtime < CACHE_TTL):
+        print("Using cached Overpass response...")
+        with gzip.open(cache_file, 'rb') as f:
+            raw = f.read()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    else:
+        response = SESSION.post(overpass_url, data={'data': query}, timeout=120)
+        response.raise_for_status()
+        data = orjson.loads(response.content) if orjson is not None else response.json()
+
+        # Write-then-rename so an interrupted run can't leave a truncated cache
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix('.tmp')
+        with gzip.open(tmp_file, 'wb') as f:
+            f.write(response.content)
+        tmp_file.replace(cache_file)
+
+    # Both result sets come back in one element list; the boundary elements
+    # are the ones tagged aeroway=aerodrome
+    boundary = []
+    inside = []
+    for e in data['elements']:
+        if e.get('tags', {}).get('aeroway') == 'aerodrome':
+            boundary.append(e)
+        else:
+            inside.append(e)
+
+    print(f"\nAerodrome elements found: {len(boundary)}")
+    for elem in boundary:
+        print(f"  - Type: {elem['type']}, ID: {elem['id']}")
+        if 'tags' in elem:
+            print(f"    Tags: {elem['tags']}")
+
+    # Save aerodrome boundary
+    save_json('cyhz_aerodrome_boundary.json', {'elements': boundary})
+
+    print("\nAerodrome boundary saved to: cyhz_aerodrome_boundary.json")
+
+    print("\n" + "="*70)
+    print("Features INSIDE aerodrome boundary")
+    print("="*70)
+
+    print(f"\nElements inside aerodrome: {len(inside)}")
+
     # Count types
-    nodes = [e for e in inside_data['elements'] if e['type'] == 'node' and 'tags' in e]
-    ways = [e for e in inside_data['elements'] if e['type'] == 'way' and 'tags' in e]
-    
+    nodes = [e for e in inside if e['type'] == 'node' and 'tags' in e]
+    ways = [e for e in inside if e['type'] == 'way' and 'tags' in e]
+
     print(f"  Tagged nodes: {len(nodes)}")
     print(f"  Tagged ways: {len(ways)}")
-    
+
     # Save
-    with open('cyhz_inside_aerodrome.json', 'w') as f:
-        json.dump(inside_data, f, indent=2)
-    
+    save_json('cyhz_inside_aerodrome.json', {'elements': inside})
+
     print("\nData saved to: cyhz_inside_aerodrome.json")
-    
+
     # Quick summary
     buildings = [w for w in ways if 'building' in w.get('tags', {})]
     aeroways = [w for w in ways if 'aeroway' in w.get('tags', {})]
     natural = [w for w in ways if 'natural' in w.get('tags', {})]
-    
+
     print(f"\n  Buildings: {len(buildings)}")
     print(f"  Aeroway features: {len(aeroways)}")
     print(f"  Natural features: {len(natural)}")
-    
+
 except Exception as e:
     print(f"\nError with area query: {e}")
     print("\nThis might mean:")
     print("  1. The aerodrome is not a proper area in OSM")
     print("  2. The area ID needs to be computed differently")
     print("  3. We need to use polygon intersection instead")
-    
+
     print("\nFalling back to using bounding box or manual filtering...")